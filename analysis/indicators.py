@@ -0,0 +1,259 @@
+import weakref, zlib
+from collections import deque
+import numpy as np
+import pandas as pd
+
+# (id(source), indicator, params) -> (stamp, anchor, values)
+_cache = {}
+_tracked = set()
+
+
+# === Core indicators (array in, array out) ===
+def sma(values, period):
+    """Simple moving average, NaN until `period` values are available."""
+    return pd.Series(np.asarray(values, dtype=float)).rolling(window=period).mean().to_numpy()
+
+def ema(values, period, seed="first", smoothing="span"):
+    """
+    Exponential moving average.
+    seed:      "first" -> start from the first value (pandas ewm, adjust=False)
+               "sma"   -> start from the SMA of the first `period` values, NaN before that
+    smoothing: "span"   -> alpha = 2 / (period + 1)
+               "wilder" -> alpha = 1 / period
+    """
+    values = np.asarray(values, dtype=float)
+    ewm_kwargs = {"span": period} if smoothing == "span" else {"alpha": 1.0 / period}
+
+    if seed == "first":
+        return pd.Series(values).ewm(adjust=False, **ewm_kwargs).mean().to_numpy()
+
+    out = np.full(len(values), np.nan)
+    if len(values) < period:
+        return out
+    seeded = np.r_[values[:period].sum() / period, values[period:]]
+    out[period - 1:] = pd.Series(seeded).ewm(adjust=False, **ewm_kwargs).mean().to_numpy()
+    return out
+
+def true_range(high, low, close):
+    """True range; the first bar has no previous close so it falls back to high - low."""
+    high = np.asarray(high, dtype=float)
+    low = np.asarray(low, dtype=float)
+    prev_close = np.r_[np.nan, np.asarray(close, dtype=float)[:-1]]
+    return np.fmax(high - low, np.fmax(np.abs(high - prev_close), np.abs(low - prev_close)))
+
+def atr(high, low, close, period=14, smoothing="sma"):
+    """Average true range. smoothing: "sma" (rolling mean), "wilder" or "span"."""
+    tr = true_range(high, low, close)
+    if smoothing == "sma":
+        return sma(tr, period)
+    if smoothing == "wilder":
+        return ema(tr, period, seed="sma", smoothing="wilder")
+    return ema(tr, period, seed="first", smoothing="span")
+
+def rsi(close, period=14, smoothing="sma"):
+    """RSI from average gains/losses. smoothing: "sma" (rolling mean) or "wilder"."""
+    delta = np.diff(np.asarray(close, dtype=float), prepend=np.nan)
+    gain = np.where(delta > 0, delta, 0)
+    loss = np.where(delta < 0, -delta, 0)
+    if smoothing == "sma":
+        avg_gain, avg_loss = sma(gain, period), sma(loss, period)
+    else:
+        avg_gain = ema(gain, period, seed="sma", smoothing="wilder")
+        avg_loss = ema(loss, period, seed="sma", smoothing="wilder")
+    with np.errstate(divide="ignore", invalid="ignore"):
+        rs = avg_gain / avg_loss
+        return 100 - (100 / (1 + rs))
+
+def avg_range(high, low, period=14):
+    """Rolling mean of the high-low range."""
+    return sma(np.asarray(high, dtype=float) - np.asarray(low, dtype=float), period)
+
+
+# === Streaming indicators (O(1) per value) ===
+def _alpha(period, smoothing):
+    # Same float path as pandas ewm (span / alpha -> com -> alpha) so values match ema()
+    com = (period - 1) / 2.0 if smoothing == "span" else (1 - 1.0 / period) / (1.0 / period)
+    return 1.0 / (1.0 + com)
+
+class StreamingEMA:
+    """Incremental ema(): same seed/smoothing options, one update per new value."""
+
+    def __init__(self, period, seed="first", smoothing="span"):
+        self.period = period
+        self.seed = seed
+        self.alpha = _alpha(period, smoothing)
+        self.value = np.nan
+        self._seed_values = []
+        self._count = 0
+
+    def update(self, x):
+        self._count += 1
+        if self._count == 1 and self.seed == "first":
+            self.value = x
+        elif self._count <= self.period and self.seed == "sma":
+            self._seed_values.append(x)
+            if self._count == self.period:
+                self.value = np.sum(self._seed_values) / self.period
+                self._seed_values = None
+        elif self.value != x:
+            old_wt = 1.0 - self.alpha
+            self.value = (old_wt * self.value + self.alpha * x) / (old_wt + self.alpha)
+        return self.value
+
+class RollingSum:
+    """Sum of the last `window` values. Re-summed once per window to cancel float drift."""
+
+    def __init__(self, window):
+        self.window = window
+        self.values = deque(maxlen=window)
+        self.total = 0.0
+        self._since_resum = 0
+
+    def update(self, x):
+        if len(self.values) == self.window:
+            self.total -= self.values[0]
+        self.values.append(x)
+        self._since_resum += 1
+        if self._since_resum >= self.window or self.total != self.total:
+            # Also re-sum while NaN: it clears as soon as the NaN leaves the window
+            self.total = sum(self.values)
+            self._since_resum = 0
+        else:
+            self.total += x
+        return self.total
+
+    @property
+    def mean(self):
+        """Mean of a full window, NaN before that (like sma())."""
+        return self.total / self.window if len(self.values) == self.window else np.nan
+
+class LaggedSum:
+    """RollingSum(window) as it stood `lag` values ago, NaN until then."""
+
+    def __init__(self, window, lag):
+        self.sum = RollingSum(window)
+        self.history = deque(maxlen=lag + 1)
+
+    def update(self, x):
+        total = self.sum.update(x)
+        self.history.append(total if len(self.sum.values) == self.sum.window else np.nan)
+        return self.total
+
+    @property
+    def total(self):
+        return self.history[0] if len(self.history) == self.history.maxlen else np.nan
+
+class StreamingATR:
+    """Incremental atr() over bars fed one (high, low, close) at a time."""
+
+    def __init__(self, period=14, smoothing="sma"):
+        self.smoothing = smoothing
+        if smoothing == "sma":
+            self._avg = RollingSum(period)
+        elif smoothing == "wilder":
+            self._avg = StreamingEMA(period, seed="sma", smoothing="wilder")
+        else:
+            self._avg = StreamingEMA(period, seed="first", smoothing="span")
+        self.prev_close = None
+
+    def update(self, high, low, close):
+        tr = high - low
+        if self.prev_close is not None:
+            tr = max(tr, abs(high - self.prev_close), abs(low - self.prev_close))
+        self.prev_close = close
+        self._avg.update(tr)
+        return self.value
+
+    @property
+    def value(self):
+        return self._avg.mean if self.smoothing == "sma" else self._avg.value
+
+
+# === Memoization ===
+def _evict(source_id):
+    _tracked.discard(source_id)
+    for key in [k for k in _cache if k[0] == source_id]:
+        del _cache[key]
+
+def memoize(source, name, params, compute, stamp=None, anchor=None):
+    """
+    Return compute() cached per (source identity, indicator, params).
+    The entry is reused while `stamp` is unchanged and dropped when `source` is garbage collected.
+    `anchor` is kept alive with the entry so ids inside `stamp` can't be recycled.
+    Sources that can't be weakly referenced (lists, numpy scalars, ...) are not cached.
+    """
+    try:
+        weakref.ref(source)
+    except TypeError:
+        return compute()
+
+    key = (id(source), name, params)
+    entry = _cache.get(key)
+    if entry is not None and entry[0] == stamp:
+        return entry[2]
+
+    values = compute()
+    values.flags.writeable = False
+    if id(source) not in _tracked:
+        weakref.finalize(source, _evict, id(source))
+        _tracked.add(id(source))
+    _cache[key] = (stamp, anchor, values)
+    return values
+
+def _compute(name, high, low, close, params):
+    if name == "atr":
+        return atr(high, low, close, **params)
+    if name == "true_range":
+        return true_range(high, low, close)
+    if name == "avg_range":
+        return avg_range(high, low, **params)
+    if name == "sma":
+        return sma(close, **params)
+    if name == "ema":
+        return ema(close, **params)
+    if name == "rsi":
+        return rsi(close, **params)
+    raise ValueError(f"Unknown indicator: {name}")
+
+def _content_stamp(*columns):
+    """CRC of the columns' bytes: changes with any in-place edit, at memory bandwidth."""
+    crc = 0
+    for values in columns:
+        crc = zlib.crc32(np.ascontiguousarray(values), crc)
+    return len(columns[0]), crc
+
+def indicator(df, name, **params):
+    """
+    Memoized indicator over an OHLC DataFrame (High/Low/Close columns).
+    The cache entry is stamped with the columns' content, so edits in place recompute it.
+    """
+    high, low, close = df['High'].to_numpy(), df['Low'].to_numpy(), df['Close'].to_numpy()
+    return memoize(
+        df, name, tuple(sorted(params.items())),
+        lambda: _compute(name, high, low, close, params),
+        stamp=_content_stamp(high, low, close),
+    )
+
+def bar_indicator(bars, name, **params):
+    """
+    Memoized indicator over a live bar container: a column store with `column(name)` and a
+    `version` counter (capital_com RingBuffer), or any sequence of high/low/close dicts.
+    Cached until a new bar is appended, so strategies sharing the same bars compute it once per bar.
+    """
+    if not len(bars):
+        return np.array([])
+
+    if hasattr(bars, "column"):
+        def compute():
+            return _compute(name, bars.column("high"), bars.column("low"), bars.column("close"), params)
+        return memoize(bars, name, tuple(sorted(params.items())), compute, stamp=bars.version)
+
+    last = bars[-1]
+
+    def compute():
+        high = np.fromiter((b["high"] for b in bars), dtype=float, count=len(bars))
+        low = np.fromiter((b["low"] for b in bars), dtype=float, count=len(bars))
+        close = np.fromiter((b["close"] for b in bars), dtype=float, count=len(bars))
+        return _compute(name, high, low, close, params)
+
+    return memoize(bars, name, tuple(sorted(params.items())), compute, stamp=(len(bars), id(last)), anchor=last)
@@ -1,6 +1,9 @@
-import os, json
-from httpx import AsyncClient
+import os, json, time, asyncio
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Iterable, List, Optional, Tuple
+from httpx import AsyncClient, Limits
 from dotenv import load_dotenv
+from .decoder import json_backend
 
 load_dotenv(override=True)
 
@@ -9,105 +12,328 @@ CAPITAL_PASSWORD = os.getenv("CAPITAL_PASSWORD")
 CAPITAL_API_KEY = os.getenv("CAPITAL_API_KEY")
 
 
-CAPITAL_AUTH_HEADER = None
+SESSION_URL = "https://api-capital.backend-capital.com/api/v1/session"
+SESSION_TTL = 10 * 60  # Capital.com sessions expire after 10 minutes
 
 
-async def get_auth_header() -> None:
-    global CAPITAL_AUTH_HEADER
+class TokenManager:
+    """
+    One cached CST / X-SECURITY-TOKEN pair for every REST call and websocket message.
+
+    `get()` only logs in when there is no token or it is within `margin` seconds of expiring;
+    concurrent callers share a single in-flight login, and a failed login is not retried for
+    `retry_delay` seconds. After each login a refresh is scheduled
+    `margin` seconds before expiry, so a running process never waits on /session. `request()`
+    attaches the tokens and, on a 401, refreshes once (unless another caller already did) and
+    retries.
+    """
+
+    def __init__(self, ttl: float = SESSION_TTL, margin: float = 60.0, retry_delay: float = 5.0):
+        self.ttl = ttl
+        self.margin = margin
+        self.retry_delay = retry_delay  # after a failed login, keep the old tokens this long
+        self.auth_header: dict = {}
+        self.expires_at = 0.0
+        self.logins = 0
+        self._retry_at = 0.0
+        self._refresh: Optional[asyncio.Task] = None
+        self._timer: Optional[asyncio.TimerHandle] = None
+
+    @property
+    def fresh(self) -> bool:
+        return bool(self.auth_header) and time.monotonic() < self.expires_at - self.margin
+
+    async def _login(self) -> dict:
+        try:
+            payload = json.dumps({
+            "identifier": CAPITAL_IDENTITY,
+            "password": CAPITAL_PASSWORD,
+            "encryptedPassword": False
+            })
+            headers = {
+                'X-CAP-API-KEY': CAPITAL_API_KEY,
+                'Content-Type': 'application/json'
+            }
+            async with AsyncClient() as session:
+                response = await session.post(SESSION_URL, headers=headers, data=payload)
+            response.raise_for_status()
+            header: dict = response.headers
+            self.auth_header = {'X-SECURITY-TOKEN': header.get("X-SECURITY-TOKEN"), 'CST': header.get("CST")}
+            self.expires_at = time.monotonic() + self.ttl
+            self.logins += 1
+
+            if self._timer is not None:
+                self._timer.cancel()
+            self._timer = asyncio.get_running_loop().call_later(max(0.0, self.ttl - self.margin), self._start_refresh)
+
+        except Exception as e:
+            print(f"Error during authentication: {e}")
+            self._retry_at = time.monotonic() + self.retry_delay
+        return self.auth_header
+
+    def _start_refresh(self) -> asyncio.Task:
+        if self._refresh is None or self._refresh.done():
+            self._refresh = asyncio.ensure_future(self._login())
+        return self._refresh
+
+    async def get(self, force: bool = False) -> dict:
+        """The cached auth header, logging in first if it is missing, stale or `force`d."""
+        if self._refresh is not None and not self._refresh.done():
+            return await asyncio.shield(self._refresh)
+        if (force or not self.fresh) and time.monotonic() >= self._retry_at:
+            return await asyncio.shield(self._start_refresh())
+        return self.auth_header
+
+    async def headers(self) -> dict:
+        """Request headers for the REST API."""
+        auth = await self.get()
+        return {"X-CAP-API-KEY": CAPITAL_API_KEY, "CST": auth.get("CST") or "", "X-SECURITY-TOKEN": auth.get("X-SECURITY-TOKEN") or ""}
+
+    async def request(self, session: AsyncClient, method: str, url: str, **kwargs):
+        """Send an authenticated request, refreshing the tokens and retrying once on 401."""
+        used = await self.headers()
+        resp = await session.request(method, url, headers=used, **kwargs)
+        if resp.status_code == 401:
+            if self.auth_header.get("CST") == used["CST"]:
+                await self.get(force=True)  # nobody refreshed since this request went out
+            else:
+                await self.get()
+            resp = await session.request(method, url, headers=await self.headers(), **kwargs)
+        return resp
+
+    def close(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+
+
+token_manager = TokenManager()
+
+
+async def get_auth_header() -> dict:
+    """Cached Capital.com auth header (see TokenManager); logs in only when needed."""
+    return await token_manager.get()
+
+
+RESOLUTION_SECONDS = {
+    "MINUTE": 60, "MINUTE_5": 300, "MINUTE_15": 900, "MINUTE_30": 1800,
+    "HOUR": 3600, "HOUR_4": 14400, "DAY": 86400, "WEEK": 604800,
+}
+PRICES_URL = "https://api-capital.backend-capital.com/api/v1/prices"
+PER_PAGE = 1000  # Capital.com caps /prices at 1000 bars per request
+EMPTY_WINDOWS = 10  # consecutive empty windows that end a backwards history download
+OHLC_HEADER = ["timestamp", "open", "high", "low", "close"]
+_, json_loads = json_backend()  # orjson/ujson when installed: price pages are large
+
+
+class RateLimiter:
+    """Token bucket shared by every request of a download: `rate` requests/s, bursts of `burst`."""
+
+    def __init__(self, rate: float = 10.0, burst: int = 10):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self):
+        async with self._lock:
+            while True:
+                current = time.monotonic()
+                self.tokens = min(self.burst, self.tokens + (current - self.updated) * self.rate)
+                self.updated = current
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+
+def last_timestamp(filename: str) -> Optional[str]:
+    """snapshotTimeUTC of the last row stored in an OHLC csv, read from the file's tail."""
     try:
-        payload = json.dumps({
-        "identifier": CAPITAL_IDENTITY,
-        "password": CAPITAL_PASSWORD,
-        "encryptedPassword": False
-        })
-        headers = {
-            'X-CAP-API-KEY': CAPITAL_API_KEY,
-            'Content-Type': 'application/json'
-        }
-        async with AsyncClient() as session:
-            response = await session.post(f"https://api-capital.backend-capital.com/api/v1/session", headers=headers, data=payload)
-        # print(response.status_code ,response.json())
-        header: dict = response.headers
-        CST = header.get("CST")
-        X_SECURITY_TOKEN = header.get("X-SECURITY-TOKEN")
-        # print(CST, X_SECURITY_TOKEN)
-        CAPITAL_AUTH_HEADER = {'X-SECURITY-TOKEN': X_SECURITY_TOKEN, 'CST': CST}
-        return CAPITAL_AUTH_HEADER
-
-    except Exception as e:
-        print(f"Error during authentication: {e}")
-        return CAPITAL_AUTH_HEADER
-        
+        with open(filename, "rb") as file:
+            file.seek(0, os.SEEK_END)
+            file.seek(max(0, file.tell() - 512))
+            lines = file.read().splitlines()
+    except FileNotFoundError:
+        return None
+    for line in reversed(lines):
+        timestamp = line.split(b",", 1)[0].decode()
+        if timestamp:
+            return None if timestamp == "timestamp" else timestamp
+    return None
 
 
+def _fmt(t: datetime) -> str:
+    return t.strftime("%Y-%m-%dT%H:%M:%S")
 
-async def save_ohlc_data(epic: str, resolution: str = "MINUTE", n: int = 5000):
+
+def _windows(start: datetime, end: datetime, step: timedelta) -> List[Tuple[str, str]]:
+    """[from, to] query ranges of at most PER_PAGE bars each, covering start..end."""
+    windows = []
+    while start <= end:
+        stop = min(start + step * (PER_PAGE - 1), end)
+        windows.append((_fmt(start), _fmt(stop)))
+        start = stop + step
+    return windows
+
+
+async def _fetch_page(session: AsyncClient, limiter: RateLimiter, url: str, params: dict, retries: int = 3) -> list:
+    for attempt in range(retries + 1):
+        await limiter.acquire()
+        resp = await token_manager.request(session, "GET", url, params=params)
+        if resp.status_code == 429 or resp.status_code >= 500:
+            if attempt < retries:
+                await asyncio.sleep(0.5 * 2 ** attempt)
+                continue
+        if resp.status_code == 404:
+            return []  # no prices in this range (market closed)
+        resp.raise_for_status()
+        return json_loads(resp.content).get("prices", [])
+    return []
+
+
+async def fetch_prices(epic: str, start: datetime, end: datetime, resolution: str = "MINUTE", rate: float = 10.0) -> list:
+    """Raw /prices bars of one epic with start <= snapshotTimeUTC <= end (naive UTC), oldest first."""
+    step = timedelta(seconds=RESOLUTION_SECONDS[resolution])
+    limiter = RateLimiter(rate, burst=max(1, int(rate)))
+    url = f"{PRICES_URL}/{epic}"
+    async with AsyncClient(timeout=30) as session:
+        pages = await asyncio.gather(*(
+            _fetch_page(session, limiter, url, {"resolution": resolution, "max": PER_PAGE, "from": frm, "to": to})
+            for frm, to in _windows(start, end, step)
+        ))
+    prices, last = [], None
+    for page in pages:
+        for p in page:
+            if last is None or p["snapshotTimeUTC"] > last:
+                prices.append(p)
+                last = p["snapshotTimeUTC"]
+    return prices
+
+
+async def _history(session: AsyncClient, limiter: RateLimiter, url: str, resolution: str, end: datetime, n: int) -> list:
+    """
+    The last `n` bars up to `end`, oldest first. Windows of PER_PAGE bars are requested
+    backwards from `end`, as many at once as the missing bars need, until `n` bars are in or
+    EMPTY_WINDOWS windows in a row come back empty (no older history). Windows over nights,
+    weekends and holidays hold fewer bars, so a wave can fall short and another one follows.
     """
-    Fetch up to n OHLC bars using pagination.
-    Capital.com allows max=1000 per page, so we loop until we get all.
+    step = timedelta(seconds=RESOLUTION_SECONDS[resolution])
+    span = step * (PER_PAGE - 1)
+    prices, empty = [], 0
+    while len(prices) < n and empty < EMPTY_WINDOWS:
+        windows = []
+        for _ in range(-(-(n - len(prices)) // PER_PAGE)):
+            windows.append((end - span, end))
+            end -= span + step
+        pages = await asyncio.gather(*(
+            _fetch_page(session, limiter, url, {"resolution": resolution, "max": PER_PAGE, "from": _fmt(frm), "to": _fmt(to)})
+            for frm, to in windows
+        ))
+        for page in pages:  # newest window first
+            empty = 0 if page else empty + 1
+            if empty >= EMPTY_WINDOWS:
+                break
+        prices = [p for page in reversed(pages) for p in page] + prices
+    return prices[-n:]
+
+
+async def download_ohlc(
+    session: AsyncClient,
+    limiter: RateLimiter,
+    epic: str,
+    resolution: str = "MINUTE",
+    n: int = 5000,
+    directory: str = "./data",
+) -> int:
     """
-    await get_auth_header()
+    Bring ./data/{epic}_{resolution}.csv up to date and return the number of bars added.
+
+    A new file gets the last `n` bars, paged backwards until that many are collected (see
+    _history). An existing one resumes after its last stored timestamp: that span is cut into
+    PER_PAGE-bar windows that are all requested at once (the limiter paces them), and the
+    pages are appended in order, each with one buffered write.
+    """
+    step = timedelta(seconds=RESOLUTION_SECONDS[resolution])
+    filename = os.path.join(directory, f"{epic}_{resolution}.csv")
+    last = last_timestamp(filename)
+    seconds = int(step.total_seconds())
+    end = datetime.fromtimestamp(time.time() // seconds * seconds, timezone.utc).replace(tzinfo=None)  # latest bar open
+
+    url = f"{PRICES_URL}/{epic}"
+    if last is None:
+        pages = [asyncio.create_task(_history(session, limiter, url, resolution, end, n))]
+    else:
+        pages = [
+            asyncio.create_task(_fetch_page(session, limiter, url, {"resolution": resolution, "max": PER_PAGE, "from": frm, "to": to}))
+            for frm, to in _windows(datetime.fromisoformat(last) + step, end, step)
+        ]
+
+    added = 0
+    os.makedirs(directory, exist_ok=True)
+    new_file = not os.path.exists(filename) or os.path.getsize(filename) == 0
     try:
-        headers = {
-            "X-CAP-API-KEY": CAPITAL_API_KEY,
-            "CST": CAPITAL_AUTH_HEADER.get("CST", ""),
-            "X-SECURITY-TOKEN": CAPITAL_AUTH_HEADER.get("X-SECURITY-TOKEN", "")
-        }
-
-        all_prices = []
-        per_page = 1000
-        page = 1
-
-        async with AsyncClient() as session:
-            while len(all_prices) < n:
-                url = (
-                    f"https://api-capital.backend-capital.com/api/v1/prices/"
-                    f"{epic}?resolution={resolution}&max={per_page}&pageNumber={page}"
-                )
-                resp = await session.get(url, headers=headers)
-                resp.raise_for_status()
-                data = resp.json()
-
-                prices = data.get("prices", [])
-                if not prices:
-                    break  # no more data
-
-                all_prices.extend(prices)
-                print(f"Fetched page {page} | Total so far: {len(all_prices)}", end="\r")
-
-                if len(prices) < per_page:
-                    break  # last page reached
-                page += 1
-
-        # Trim to requested n
-        all_prices = all_prices[:n]
-        all_prices.sort(key=lambda p: p["snapshotTimeUTC"])
-
-        filename = f"./data/{epic}_{resolution}.csv"
-        append_csv(filename, ["timestamp", "open", "high", "low", "close"])
-
-        for i, p in enumerate(all_prices):
-            try:
-                t = p["snapshotTimeUTC"]
-                o = float(p["openPrice"]["bid"])
-                h = float(p["highPrice"]["bid"])
-                l = float(p["lowPrice"]["bid"])
-                c = float(p["closePrice"]["bid"])
-            except (KeyError, TypeError, ValueError):
-                continue
+        with open(filename, mode="a", newline="") as file:
+            if new_file:
+                file.write(",".join(OHLC_HEADER) + "\n")
+            for page in pages:
+                rows = []
+                for p in await page:
+                    try:
+                        t = p["snapshotTimeUTC"]
+                        o = float(p["openPrice"]["bid"])
+                        h = float(p["highPrice"]["bid"])
+                        l = float(p["lowPrice"]["bid"])
+                        c = float(p["closePrice"]["bid"])
+                    except (KeyError, TypeError, ValueError):
+                        continue
+                    if last is None or t > last:  # windows may overlap at their edges
+                        rows.append(f"{t},{o!r},{h!r},{l!r},{c!r}\n")
+                        last = t
+                if rows:
+                    file.write("".join(rows))
+                    added += len(rows)
+    finally:
+        # A failed page stops the file at the last complete one; the next run resumes there
+        for page in pages:
+            page.cancel()
+        await asyncio.gather(*pages, return_exceptions=True)
+    return added
+
 
-            append_csv(filename, [t, o, h, l, c])
+async def bulk_download(
+    epics: Iterable[str],
+    resolutions: Iterable[str] = ("MINUTE",),
+    n: int = 5000,
+    directory: str = "./data",
+    rate: float = 10.0,
+    concurrency: int = 8,
+) -> Dict[Tuple[str, str], int]:
+    """
+    Download or resume every epic x resolution concurrently over one pooled client, all
+    sharing one rate limiter. Returns bars added per (epic, resolution); -1 marks a failure.
+    """
+    await token_manager.get()
+    limiter = RateLimiter(rate, burst=max(1, int(rate)))
+    jobs = [(epic, resolution) for epic in epics for resolution in resolutions]
 
+    async with AsyncClient(timeout=30, limits=Limits(max_connections=concurrency, max_keepalive_connections=concurrency)) as session:
+        async def run(epic: str, resolution: str) -> int:
+            try:
+                added = await download_ohlc(session, limiter, epic, resolution, n, directory)
+                print(f"{epic} {resolution}: +{added} bars")
+                return added
+            except Exception as e:
+                print(f"Error fetching OHLC data for {epic} {resolution}: {e}")
+                return -1
 
-    except Exception as e:
-        print(f"Error fetching OHLC data: {e}")
-        return []
-    
+        results = await asyncio.gather(*(run(epic, resolution) for epic, resolution in jobs))
+    return dict(zip(jobs, results))
 
 
-def append_csv(filename: str, row: list):
-    """Append a row to a CSV file."""
-    import csv
-    with open(filename, mode='a', newline='') as file:
-        writer = csv.writer(file)
-        writer.writerow(row)
\ No newline at end of file
+async def save_ohlc_data(epic: str, resolution: str = "MINUTE", n: int = 5000):
+    """
+    Fetch up to n OHLC bars into ./data/{epic}_{resolution}.csv, resuming an existing file.
+    """
+    return (await bulk_download([epic], [resolution], n))[(epic, resolution)]
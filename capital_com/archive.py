@@ -1,13 +1,15 @@
 from enum import Enum
 from typing import Optional
 import asyncio
-from datetime import datetime, time
-import pandas as pd
+from datetime import time
+import numpy as np
 from .hook import send_hook
+from . import clock
 
 # --- External imports (you already have these) ---
 from .simulator import new_order, SignalType
 from .memory import memory
+from .live_indicators import LiveIndicators
 
 
 class TrendBias(str, Enum):
@@ -18,42 +20,22 @@ class TrendBias(str, Enum):
 
 def is_trading_session() -> bool:
     """Only trade during high-liquidity windows (UTC)."""
-    now = datetime.utcnow().time()
+    now = clock.utcnow().time()
     # Primary: London–NY overlap
     return time(12, 0) <= now <= time(16, 30)
 
 
-def get_trend_bias(bars_list: list) -> TrendBias:
-    """Simple EMA(8) vs EMA(20) trend filter on 30-sec closes."""
-    if len(bars_list) < 20:
-        return TrendBias.NEUTRAL
-
-    closes = [b["close"] for b in bars_list[-40:]]
-    ema8 = pd.Series(closes).ewm(span=8, adjust=False).mean().iloc[-1]
-    ema20 = pd.Series(closes).ewm(span=20, adjust=False).mean().iloc[-1]
-
-    if ema8 > ema20 * 1.001:
-        return TrendBias.UPTREND
-    elif ema8 < ema20 * 0.999:
-        return TrendBias.DOWNTREND
-    else:
-        return TrendBias.NEUTRAL
-
-
-def atr_14(bars_list: list) -> float:
-    """Compute 14-period Average True Range from 30-sec bars."""
-    if len(bars_list) < 15:
+def atr_14(indicators: LiveIndicators, lookback_bars: int) -> float:
+    """14-period Average True Range of 30-sec bars, from the epic's streaming state."""
+    if lookback_bars < 15:
         # Fallback: use recent average range
-        recent = bars_list[-5:] if bars_list else [{"high": 1, "low": 1}]
-        return max(b["high"] - b["low"] for b in recent)
-
-    trs = []
-    for i in range(1, len(bars_list)):
-        h, l, c_prev = bars_list[i]["high"], bars_list[i]["low"], bars_list[i-1]["close"]
-        tr = max(h - l, abs(h - c_prev), abs(l - c_prev))
-        trs.append(tr)
+        bars = indicators.bars
+        n = min(5, lookback_bars, len(bars))
+        if not n:
+            return 0
+        return float(np.max(bars.column("high", n) - bars.column("low", n)))
 
-    return sum(trs[-14:]) / 14
+    return indicators.atr(14)
 
 
 
@@ -69,14 +51,14 @@ async def get_latest_signal(epic: str, lookback_bars: int = 60):
     if len(bars) < lookback_bars:
         return None
 
-    bars_list = list(bars)[-lookback_bars:]
-    current = bars_list[-1]
+    indicators = memory.indicators[epic]
+    current = bars[-1]
 
     # -----------------------------
     # Basic market quality filters
     # -----------------------------
-    avg_spread = sum(b["avg_spread"] for b in bars_list) / len(bars_list)
-    atr = atr_14(bars_list)
+    avg_spread = indicators.rolling_mean("avg_spread", lookback_bars)
+    atr = atr_14(indicators, lookback_bars)
 
     if current["avg_spread"] > avg_spread * 1.6:
         return None
@@ -87,29 +69,22 @@ async def get_latest_signal(epic: str, lookback_bars: int = 60):
     # -----------------------------
     # VWAP (rolling / pseudo-session)
     # -----------------------------
-    pv_sum = 0.0
-    v_sum = 0.0
-    vwap_series = []
-
-    for b in bars_list:
-        vol = b.get("volume", 1)
-        price = (b["high"] + b["low"] + b["close"]) / 3
-        pv_sum += price * vol
-        v_sum += vol
-        vwap_series.append(pv_sum / v_sum)
-
-    vwap = vwap_series[-1]
-    vwap_prev = vwap_series[-5]  # slope proxy
+    pv_sum = indicators.rolling_sum("pv", lookback_bars)
+    v_sum = indicators.rolling_sum("volume", lookback_bars)
+
+    vwap = pv_sum / v_sum
+    # slope proxy: VWAP of the window without its last 4 bars
+    vwap_prev = indicators.rolling_sum("pv", lookback_bars - 4, lag=4) / indicators.rolling_sum("volume", lookback_bars - 4, lag=4)
     vwap_slope = vwap - vwap_prev
 
     # -----------------------------
     # Stay logic (acceptance)
     # -----------------------------
     stay_bars = 6  # ~3 minutes
-    closes = [b["close"] for b in bars_list[-stay_bars:]]
+    closes = bars.column("close", stay_bars)
 
-    above_vwap = sum(c > vwap for c in closes)
-    below_vwap = sum(c < vwap for c in closes)
+    above_vwap = int(np.count_nonzero(closes > vwap))
+    below_vwap = int(np.count_nonzero(closes < vwap))
 
     stay_above = above_vwap >= int(stay_bars * 0.7)
     stay_below = below_vwap >= int(stay_bars * 0.7)
@@ -117,8 +92,7 @@ async def get_latest_signal(epic: str, lookback_bars: int = 60):
     # -----------------------------
     # Volume regime (participation)
     # -----------------------------
-    volumes = [b.get("volume", 1) for b in bars_list]
-    vol_avg = sum(volumes[:-1]) / (len(volumes) - 1)
+    vol_avg = (v_sum - current["volume"]) / (lookback_bars - 1)
 
     vol_expansion = current["volume"] > vol_avg * 1.3
 
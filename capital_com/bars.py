@@ -0,0 +1,245 @@
+import inspect
+from abc import ABC, abstractmethod
+from collections import defaultdict
+from typing import Awaitable, Callable, Dict, List, Optional, Union
+
+from .ring import RingBuffer
+
+BAR_FIELDS = ("open", "high", "low", "close", "start_time", "end_time", "avg_spread", "volume")
+
+
+CloseCallback = Callable[[str, "BarSeries"], Union[None, Awaitable]]
+
+
+class BarSeries(ABC):
+    """
+    One bar specification over every epic: closed bars per epic in a RingBuffer (BAR_FIELDS,
+    like Memory.bars), the partial bar per epic, close callbacks and the series derived from it.
+    Bars follow Memory's conventions: open/close are mids, high is the highest ask, low the
+    lowest bid, avg_spread the mean spread and volume the tick count.
+    """
+
+    def __init__(self, name: str, capacity: int = 500):
+        self.name = name
+        self.bars: Dict[str, RingBuffer] = defaultdict(lambda: RingBuffer(BAR_FIELDS, capacity))
+        self.current: Dict[str, dict] = {}
+        self.callbacks: List[CloseCallback] = []
+        self.derived: List["TimeBars"] = []
+        self.pending: List[Awaitable] = []  # awaitables returned by callbacks; shared by a BarEngine's series
+
+    def on_close(self, callback: CloseCallback):
+        """
+        Call `callback(epic, series)` after each bar close; usable as a decorator. Coroutine
+        functions (strategies) are fine: what they return is collected in `pending` and
+        awaited by BarEngine.on_tick once the tick has gone through every series.
+        """
+        self.callbacks.append(callback)
+        return callback
+
+    def reset(self):
+        self.bars.clear()
+        self.current.clear()
+
+    def _open(self, epic: str, ask: float, bid: float, ts: float, mid: float, spread: float) -> dict:
+        bar = self.current[epic] = {
+            "open": mid,
+            "high": ask,
+            "low": bid,
+            "close": mid,
+            "start_time": ts,
+            "spread_sum": spread,
+            "tick_count": 1,
+        }
+        return bar
+
+    @staticmethod
+    def _add(bar: dict, ask: float, bid: float, mid: float, spread: float):
+        if ask > bar["high"]:
+            bar["high"] = ask
+        if bid < bar["low"]:
+            bar["low"] = bid
+        bar["close"] = mid
+        bar["spread_sum"] += spread
+        bar["tick_count"] += 1
+
+    def _close(self, epic: str, bar: dict, end_time: float):
+        self.bars[epic].append(
+            bar["open"],
+            bar["high"],
+            bar["low"],
+            bar["close"],
+            bar["start_time"],
+            end_time,
+            bar["spread_sum"] / bar["tick_count"],
+            bar["tick_count"],
+        )
+        for callback in self.callbacks:
+            result = callback(epic, self)
+            if inspect.isawaitable(result):
+                self.pending.append(result)
+        for series in self.derived:
+            series.on_bar(epic, bar, end_time)
+
+    @abstractmethod
+    def on_tick(self, epic: str, ask: float, bid: float, ts: float, mid: float, spread: float):
+        """Add one quote to the epic's partial bar, closing it when the series' rule says so."""
+
+
+class TimeBars(BarSeries):
+    """
+    Bars of `seconds` duration. From ticks they close exactly like Memory's bars: the first tick
+    at least `seconds` after the bar start closes it and also opens the next bar.
+    Derived from a finer series, they merge its closed bars and close with the finer bar
+    that reaches `seconds`, so their boundaries follow the finer bars; only time bars can
+    be derived that way. A tick that closes one finer time bar and opens the next is counted
+    once, so volume and avg_spread match bars built from the same ticks over those boundaries.
+    """
+
+    def __init__(self, name: str, seconds: float, capacity: int = 500):
+        super().__init__(name, capacity)
+        self.seconds = seconds
+
+    def on_tick(self, epic, ask, bid, ts, mid, spread):
+        bar = self.current.get(epic)
+        if bar is None:
+            self._open(epic, ask, bid, ts, mid, spread)
+            return
+        self._add(bar, ask, bid, mid, spread)
+        if ts - bar["start_time"] >= self.seconds:
+            self._close(epic, bar, ts)
+            # The closing tick is also this bar's first; derived bars must not count it twice
+            self._open(epic, ask, bid, ts, mid, spread)["shared_spread"] = spread
+
+    def on_bar(self, epic: str, fine: dict, end_time: float):
+        bar = self.current.get(epic)
+        if bar is None:
+            bar = self.current[epic] = dict(fine)
+        else:
+            bar["high"] = max(bar["high"], fine["high"])
+            bar["low"] = min(bar["low"], fine["low"])
+            bar["close"] = fine["close"]
+            if "shared_spread" in fine:
+                bar["spread_sum"] += fine["spread_sum"] - fine["shared_spread"]
+                bar["tick_count"] += fine["tick_count"] - 1
+            else:
+                bar["spread_sum"] += fine["spread_sum"]
+                bar["tick_count"] += fine["tick_count"]
+        if end_time - bar["start_time"] >= self.seconds:
+            del self.current[epic]
+            self._close(epic, bar, end_time)
+
+
+class TickBars(BarSeries):
+    """Bars of exactly `count` ticks; the next tick opens the next bar."""
+
+    def __init__(self, name: str, count: int, capacity: int = 500):
+        super().__init__(name, capacity)
+        self.count = count
+
+    def on_tick(self, epic, ask, bid, ts, mid, spread):
+        bar = self.current.get(epic)
+        if bar is None:
+            bar = self._open(epic, ask, bid, ts, mid, spread)
+        else:
+            self._add(bar, ask, bid, mid, spread)
+        if bar["tick_count"] >= self.count:
+            del self.current[epic]
+            self._close(epic, bar, ts)
+
+
+class RangeBars(BarSeries):
+    """Bars that close once the mid price has ranged over `size`; the next tick opens the next bar."""
+
+    def __init__(self, name: str, size: float, capacity: int = 500):
+        super().__init__(name, capacity)
+        self.size = size
+
+    def on_tick(self, epic, ask, bid, ts, mid, spread):
+        bar = self.current.get(epic)
+        if bar is None:
+            bar = self._open(epic, ask, bid, ts, mid, spread)
+            bar["mid_high"] = bar["mid_low"] = mid
+            return
+        self._add(bar, ask, bid, mid, spread)
+        if mid > bar["mid_high"]:
+            bar["mid_high"] = mid
+        elif mid < bar["mid_low"]:
+            bar["mid_low"] = mid
+        if bar["mid_high"] - bar["mid_low"] >= self.size:
+            del self.current[epic]
+            self._close(epic, bar, ts)
+
+
+class BarEngine:
+    """
+    Builds any number of bar series from one pass over the tick stream.
+
+    Series fed by ticks each do O(1) work per tick. A series added with `source=` is built
+    from the closed bars of that finer series instead, so it does no per-tick work at all:
+    e.g. 1m from ticks, 5m and 15m from the 1m closes, 1h from the 15m closes.
+
+        engine = BarEngine()
+        engine.time("30s", 30)
+        engine.time("1m", 60)
+        engine.time("5m", 300, source="1m")
+        engine.ticks("100t", 100)
+        engine["5m"].on_close(lambda epic, series: print(epic, series.bars[epic][-1]))
+        engine["1m"].on_close(lambda epic, series: get_latest_signal(epic))  # awaited
+        engine["30s"].on_close(lambda epic, series: memory.evaluator.submit(epic))
+        memory.bar_engine = engine
+
+    Coroutine callbacks are awaited on the tick path, like Memory's strategies without an
+    evaluator; in live trading, submitting to the StrategyEvaluator keeps them off it.
+    """
+
+    def __init__(self, capacity: int = 500):
+        self.capacity = capacity
+        self.series: Dict[str, BarSeries] = {}
+        self._tick_series: List[BarSeries] = []
+        self._pending: List[Awaitable] = []
+
+    def __getitem__(self, name: str) -> BarSeries:
+        return self.series[name]
+
+    def __contains__(self, name: str) -> bool:
+        return name in self.series
+
+    def add(self, series: BarSeries, source: Optional[str] = None) -> BarSeries:
+        if series.name in self.series:
+            raise ValueError(f"Bar series {series.name!r} already exists")
+        if source is None:
+            self._tick_series.append(series)
+        elif not isinstance(series, TimeBars):
+            raise ValueError(f"Only time bars can be built from another series, not {type(series).__name__}")
+        elif source not in self.series:
+            raise ValueError(f"Unknown source series {source!r}")
+        else:
+            self.series[source].derived.append(series)
+        series.pending = self._pending
+        self.series[series.name] = series
+        return series
+
+    def time(self, name: str, seconds: float, source: Optional[str] = None) -> BarSeries:
+        return self.add(TimeBars(name, seconds, self.capacity), source)
+
+    def ticks(self, name: str, count: int) -> BarSeries:
+        return self.add(TickBars(name, count, self.capacity))
+
+    def range(self, name: str, size: float) -> BarSeries:
+        return self.add(RangeBars(name, size, self.capacity))
+
+    async def on_tick(self, epic: str, ask: float, bid: float, ts: float):
+        """Feed one quote (ts in seconds) to every tick-built series, then await the close callbacks it triggered."""
+        mid = (ask + bid) / 2.0
+        spread = ask - bid
+        for series in self._tick_series:
+            series.on_tick(epic, ask, bid, ts, mid, spread)
+        if self._pending:
+            pending = self._pending[:]
+            self._pending.clear()
+            for awaitable in pending:
+                await awaitable
+
+    def reset(self):
+        for series in self.series.values():
+            series.reset()
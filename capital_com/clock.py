@@ -0,0 +1,20 @@
+import time as _time
+from datetime import datetime
+from typing import Optional
+
+# When set, every clock read returns this epoch time (seconds) instead of the wall clock
+_virtual_time: Optional[float] = None
+
+
+def set_virtual_time(ts: Optional[float]):
+    """Pin the clock to `ts` (epoch seconds); None goes back to the wall clock."""
+    global _virtual_time
+    _virtual_time = ts
+
+
+def time() -> float:
+    return _time.time() if _virtual_time is None else _virtual_time
+
+
+def utcnow() -> datetime:
+    return datetime.utcnow() if _virtual_time is None else datetime.utcfromtimestamp(_virtual_time)
@@ -0,0 +1,110 @@
+import json, re, time
+from typing import Callable, List, Optional, Tuple
+
+# (epic, ask, ask_size, bid, bid_size, timestamp) -- the argument order of Memory.log_quotes
+Quote = Tuple[str, float, float, float, float, int]
+
+# Capital.com quote payload fields, in the order the stream sends them
+_QUOTE = re.compile(
+    r'"epic":\s*"([^"]*)".*?'
+    r'"bid":\s*([-+.\deE]+).*?'
+    r'"bidQty":\s*([-+.\deE]+).*?'
+    r'"ofr":\s*([-+.\deE]+).*?'
+    r'"ofrQty":\s*([-+.\deE]+).*?'
+    r'"timestamp":\s*(\d+)',
+    re.S,
+)
+
+
+def json_backend(name: Optional[str] = None) -> Tuple[str, Callable]:
+    """Fastest installed JSON decoder (orjson, then ujson, then the stdlib) or the named one."""
+    for candidate in ([name] if name else ["orjson", "ujson", "json"]):
+        if candidate == "json":
+            return "json", json.loads
+        try:
+            module = __import__(candidate)
+        except ImportError:
+            if name:
+                raise
+            continue
+        return candidate, module.loads
+    return "json", json.loads
+
+
+def _number(text: str):
+    """A JSON number literal as the JSON decoders return it: int when integral in the text, else float."""
+    return int(text) if text.lstrip("-").isdigit() else float(text)
+
+
+def _quote_from_payload(payload: dict) -> Quote:
+    return (payload["epic"], payload["ofr"], payload.get("ofrQty", 0), payload["bid"], payload.get("bidQty", 0), payload["timestamp"])
+
+
+class FrameDecoder:
+    """
+    Decodes websocket frames into (destination, data).
+
+    Quote frames, nearly all of the traffic, come back as ("quote", Quote) tuples with only the
+    fields Memory needs. With a fast JSON backend (orjson/ujson) the frame is parsed by it;
+    on the stdlib backend a regex pulls the six fields out of the raw text instead, which is
+    cheaper than building the full dict. Anything unexpected falls back to a full decode.
+    """
+
+    def __init__(self, backend: Optional[str] = None):
+        self.backend, self.loads = json_backend(backend)
+        self.regex_quotes = self.backend == "json"
+
+    def decode(self, message) -> Tuple[str, object]:
+        if self.regex_quotes and isinstance(message, str) and '"quote"' in message:
+            match = _QUOTE.search(message)
+            if match is not None:
+                epic, bid, bid_qty, ofr, ofr_qty, ts = match.groups()
+                return "quote", (epic, _number(ofr), _number(ofr_qty), _number(bid), _number(bid_qty), int(ts))
+
+        data = self.loads(message)
+        destination = data.get("destination")
+        if destination == "quote":
+            return "quote", _quote_from_payload(data["payload"])
+        return destination, data
+
+
+def decode_dict(message) -> Tuple[str, object]:
+    """Previous listener path: json.loads into a full dict, then compare the destination."""
+    data = json.loads(message)
+    if data["destination"] == "quote":
+        return "quote", _quote_from_payload(data["payload"])
+    return data["destination"], data
+
+
+def benchmark(frames: List[str], seconds: float = 1.0) -> dict:
+    """Frames/sec of the dict decoder against FrameDecoder on every available backend."""
+    decoders = {"json.loads dict": decode_dict}
+    for backend in ("json", "ujson", "orjson"):
+        try:
+            decoders[f"FrameDecoder[{backend}]"] = FrameDecoder(backend).decode
+        except ImportError:
+            pass
+
+    # repr, not ==: 21001 == 21001.0, but the two would be recorded differently
+    expected = [repr(decode_dict(f)) for f in frames]
+    results = {}
+    for name, decode in decoders.items():
+        assert [repr(decode(f)) for f in frames] == expected, f"{name} decodes differently"
+        count, start = 0, time.perf_counter()
+        while time.perf_counter() - start < seconds:
+            for frame in frames:
+                decode(frame)
+            count += len(frames)
+        results[name] = count / (time.perf_counter() - start)
+    return results
+
+
+
+if __name__ == "__main__":
+    with open("./quote.txt") as f:
+        recorded = f.read()
+    # The recorded frame as received (pretty-printed) and as the compact text the stream sends
+    frames = [recorded, json.dumps(json.loads(recorded), separators=(",", ":"))] * 10
+    frames += [json.dumps({"destination": "marketData.subscribe", "payload": {"subscriptions": {"GOLD": "PROCESSED"}}})]
+    for name, rate in benchmark(frames).items():
+        print(f"{name:<24} {rate:>12,.0f} frames/s")
@@ -0,0 +1,152 @@
+import asyncio
+from collections import defaultdict
+from typing import Dict, Optional, Set, Tuple
+
+from httpx import AsyncClient, Limits
+
+from .latency import latency, now
+
+WEBHOOK_URL = "http://127.0.0.1:3556/webhook/trading-view"
+
+
+class HookStats:
+    """Counters and latency (enqueue -> response) of one hook name."""
+
+    def __init__(self):
+        self.sent = 0
+        self.failed = 0
+        self.retries = 0
+        self.coalesced = 0
+        self.latency_sum = 0.0
+        self.latency_max = 0.0
+
+    def summary(self) -> dict:
+        done = self.sent + self.failed
+        return {
+            "sent": self.sent,
+            "failed": self.failed,
+            "retries": self.retries,
+            "coalesced": self.coalesced,
+            "avg_ms": self.latency_sum / done * 1000 if done else 0.0,
+            "max_ms": self.latency_max * 1000,
+        }
+
+
+class HookDispatcher:
+    """
+    Outbound webhook queue with one pooled keep-alive client.
+
+    `enqueue` returns immediately. Hooks queued within `coalesce_delay` seconds of each other
+    (e.g. every epic whose bar closed on the same tick) go out as one batch; a repeat of the
+    same epic + hook name inside a batch replaces the earlier payload. At most `concurrency`
+    requests are in flight; failures and 5xx responses are retried with exponential backoff.
+    """
+
+    def __init__(
+        self,
+        url: str = WEBHOOK_URL,
+        concurrency: int = 4,
+        retries: int = 3,
+        backoff: float = 0.5,
+        timeout: float = 10.0,
+        coalesce_delay: float = 0.02,
+    ):
+        self.url = url
+        self.concurrency = concurrency
+        self.retries = retries
+        self.backoff = backoff
+        self.timeout = timeout
+        self.coalesce_delay = coalesce_delay
+
+        self._client: Optional[AsyncClient] = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._pending: Dict[Tuple[str, str], Tuple[dict, int, Optional[int]]] = {}
+        self._wake: Optional[asyncio.Event] = None
+        self._loop_task: Optional[asyncio.Task] = None
+        self._in_flight: Set[asyncio.Task] = set()
+        self.stats: Dict[str, HookStats] = defaultdict(HookStats)
+
+    def _start(self):
+        self._client = AsyncClient(
+            timeout=self.timeout,
+            limits=Limits(max_connections=self.concurrency, max_keepalive_connections=self.concurrency),
+        )
+        self._semaphore = asyncio.Semaphore(self.concurrency)
+        self._wake = asyncio.Event()
+        self._loop_task = asyncio.create_task(self._run())
+
+    def enqueue(self, payload: dict, origin: Optional[int] = None):
+        """Queue a hook; `origin` is the perf_counter_ns time its signal started from (latency)."""
+        if self._loop_task is None or self._loop_task.done():
+            self._start()
+        key = (payload["epic"], payload["hook_name"])
+        if key in self._pending:
+            self.stats[payload["hook_name"]].coalesced += 1
+        self._pending[key] = (payload, now(), origin)
+        self._wake.set()
+
+    async def _run(self):
+        while True:
+            await self._wake.wait()
+            if self.coalesce_delay:
+                await asyncio.sleep(self.coalesce_delay)
+            else:
+                await asyncio.sleep(0)  # let the rest of this bar close queue its hooks
+            self._wake.clear()
+            batch, self._pending = self._pending, {}
+            for payload, queued_at, origin in batch.values():
+                task = asyncio.create_task(self._send(payload, queued_at, origin))
+                self._in_flight.add(task)
+                task.add_done_callback(self._in_flight.discard)
+
+    async def _send(self, payload: dict, queued_at: int, origin: Optional[int]):
+        stats = self.stats[payload["hook_name"]]
+        for attempt in range(self.retries + 1):
+            async with self._semaphore:
+                try:
+                    res = await self._client.post(self.url, json=payload)
+                    if res.status_code < 500:
+                        break
+                except Exception as e:
+                    res, error = None, str(e) or type(e).__name__
+            if attempt < self.retries:
+                stats.retries += 1
+                await asyncio.sleep(self.backoff * 2 ** attempt)  # backoff without holding a slot
+
+        done = now()
+        elapsed = (done - queued_at) / 1e9
+        stats.latency_sum += elapsed
+        stats.latency_max = max(stats.latency_max, elapsed)
+        if res is None or res.status_code >= 400:
+            stats.failed += 1
+            reason = error if res is None else res.status_code
+            print(f"{payload['hook_name']} Hook | {payload['epic']}: failed ({reason}) -> {payload['direction']}")
+            return
+        stats.sent += 1
+        latency.record(payload["epic"], f"hook:{payload['hook_name']}", queued_at, done)
+        if origin is not None:
+            latency.record(payload["epic"], f"e2e:{payload['hook_name']}", origin, done)
+        print(f"{payload['hook_name']} Hook | {payload['epic']}: {res.status_code} -> {payload['direction']} | TP: ${payload['profit']} | SL: ${payload['loss']} | Trail: ${payload['trail_sl']} | {elapsed * 1000:.0f}ms")
+
+    async def drain(self):
+        """Wait until every queued hook has been sent (or has failed)."""
+        while self._pending or self._in_flight:
+            if self._in_flight:
+                await asyncio.gather(*list(self._in_flight), return_exceptions=True)
+            else:
+                await asyncio.sleep(0.01)
+
+    async def close(self):
+        if self._loop_task is None:
+            return
+        await self.drain()
+        self._loop_task.cancel()
+        await asyncio.gather(self._loop_task, return_exceptions=True)
+        self._loop_task = None
+        await self._client.aclose()
+
+    def summary(self) -> Dict[str, dict]:
+        return {name: stats.summary() for name, stats in self.stats.items()}
+
+
+dispatcher = HookDispatcher()
@@ -0,0 +1,89 @@
+import asyncio, time
+from collections import defaultdict, deque
+from typing import Awaitable, Callable, Deque, Dict, Set
+
+
+class StrategyEvaluator:
+    """
+    Runs bar-close strategy evaluation off the tick ingestion path.
+
+    `submit` is synchronous and never blocks: it puts a bar-close event on the epic's bounded
+    queue and returns. One worker task per epic awaits `evaluate(epic)` for each event, so a
+    slow strategy or webhook only delays its own epic and never the websocket recv loop.
+    When an epic's queue is full the oldest pending event is dropped (conflated): strategies
+    read the latest bars when they run, so the newest event already covers the skipped ones.
+    """
+
+    def __init__(self, evaluate: Callable[[str], Awaitable], maxsize: int = 1):
+        self.evaluate = evaluate
+        self.maxsize = maxsize
+        self.queues: Dict[str, Deque[float]] = {}  # submit times of pending bar closes
+        self._ready: Dict[str, asyncio.Event] = {}
+        self._workers: Dict[str, asyncio.Task] = {}
+        self._busy: Set[str] = set()
+
+        self.submitted = defaultdict(int)
+        self.evaluated = defaultdict(int)
+        self.conflated = defaultdict(int)
+        self.errors = defaultdict(int)
+        self.max_depth = defaultdict(int)
+        self.max_lag = defaultdict(float)  # seconds from submit to evaluation start
+
+    def submit(self, epic: str):
+        queue = self.queues.get(epic)
+        if queue is None:
+            queue = self.queues[epic] = deque()
+            self._ready[epic] = asyncio.Event()
+        if epic not in self._workers or self._workers[epic].done():
+            self._workers[epic] = asyncio.create_task(self._worker(epic))
+
+        if len(queue) >= self.maxsize:
+            queue.popleft()
+            self.conflated[epic] += 1
+        queue.append(time.perf_counter())
+        self.submitted[epic] += 1
+        self.max_depth[epic] = max(self.max_depth[epic], len(queue))
+        self._ready[epic].set()
+
+    async def _worker(self, epic: str):
+        queue, ready = self.queues[epic], self._ready[epic]
+        while True:
+            await ready.wait()
+            ready.clear()
+            while queue:
+                submitted_at = queue.popleft()
+                self.max_lag[epic] = max(self.max_lag[epic], time.perf_counter() - submitted_at)
+                self._busy.add(epic)
+                try:
+                    await self.evaluate(epic)
+                except Exception as e:
+                    self.errors[epic] += 1
+                    print(f"Strategy error for {epic}: {e}")
+                finally:
+                    self._busy.discard(epic)
+                self.evaluated[epic] += 1
+
+    async def drain(self):
+        """Wait until every queued event has been evaluated."""
+        while self._busy or any(self.queues.values()):
+            await asyncio.sleep(0.01)
+
+    async def stop(self):
+        for task in self._workers.values():
+            task.cancel()
+        await asyncio.gather(*self._workers.values(), return_exceptions=True)
+        self._workers.clear()
+
+    def stats(self) -> Dict[str, dict]:
+        return {
+            epic: {
+                "depth": len(queue),
+                "max_depth": self.max_depth[epic],
+                "submitted": self.submitted[epic],
+                "evaluated": self.evaluated[epic],
+                "conflated": self.conflated[epic],
+                "errors": self.errors[epic],
+                "max_lag_ms": self.max_lag[epic] * 1000,
+            }
+            for epic, queue in self.queues.items()
+        }
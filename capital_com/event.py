@@ -1,13 +1,15 @@
-from httpx import AsyncClient
-from datetime import datetime, time
+from datetime import time
 from typing import Tuple
+from analysis.indicators import atr
+from . import clock
 
 
 def get_scalp_rr(epic: str, risk_usd: float = 25.0) -> Tuple[int, int, int]:
     from .memory import memory
     # Minimal viable bars
-    bars = list(memory.bars[epic])[-15:]
-    if len(bars) < 5:
+    bars = memory.bars[epic]
+    n = min(len(bars), 15)
+    if n < 5:
         return 50, 25, 15  # conservative fallback
 
     # Price & spread
@@ -19,13 +21,12 @@ def get_scalp_rr(epic: str, risk_usd: float = 25.0) -> Tuple[int, int, int]:
         entry = bars[-1]["close"]
         spread = 0.5
 
-    # ATR (5-bar for speed)
-    trs = []
-    for i in range(1, len(bars)):
-        h, l, c_prev = bars[i]["high"], bars[i]["low"], bars[i-1]["close"]
-        tr = max(h - l, abs(h - c_prev), abs(l - c_prev))
-        trs.append(tr)
-    atr_val = max(3.0, sum(trs) / len(trs)) if trs else 4.0
+    # ATR over every true range in the 15-bar window; streamed once the window is full
+    if n == 15:
+        atr_val = memory.indicators[epic].atr(14)
+    else:
+        atr_val = float(atr(bars.column("high", n), bars.column("low", n), bars.column("close", n), n - 1)[-1])
+    atr_val = max(3.0, atr_val)
 
     # Spread stress: if spread > 0.6, widen SL
     spread_mult = 1.0 + max(0.0, (spread - 0.5) / 0.5)  # 0.5→1.0: +0% to +100%
@@ -51,7 +52,7 @@ def get_scalp_rr(epic: str, risk_usd: float = 25.0) -> Tuple[int, int, int]:
 
 
 def is_trading_session() -> bool:
-    now = datetime.utcnow()
+    now = clock.utcnow()
     t = now.time()
     # Exclude high-impact news minutes (simpler: use a quiet window)
     # Ideal: 12:30–15:00 UTC (avoid open rush & 16:30 close rush)
@@ -78,20 +79,20 @@ async def strategies(epic: str):
     from .signals import get_ema_signal_from_bars, order_block_signal
 
 
-    async with AsyncClient() as session:
-        # momentum punch
-        momentum_signal = momentum_punch_signal(epic)
-        if momentum_signal:
-            await send_hook(ticker=epic, hook_name="momentum", direction=momentum_signal, amount=amount, profit=profit, loss=loss, trail_sl=loss, session=session, strategy=True)
+    # Hooks are queued on the shared dispatcher; strategies never wait on the network
+    # momentum punch
+    momentum_signal = momentum_punch_signal(epic)
+    if momentum_signal:
+        await send_hook(ticker=epic, hook_name="momentum", direction=momentum_signal, amount=amount, profit=profit, loss=loss, trail_sl=loss, strategy=True)
 
 
-        # 10/20/300 EMA
-        # ema_signal = get_ema_signal_from_bars(epic=epic, fast_period=10, slow_period=20, trend_period=trend_period)
-        # if ema_signal:
-        #     await send_hook(ticker=epic, hook_name=f"10/20/{trend_period}", direction=ema_signal, amount=amount, profit=profit, loss=loss, trail_sl=loss, session=session, strategy=True)
+    # 10/20/300 EMA
+    # ema_signal = get_ema_signal_from_bars(epic=epic, fast_period=10, slow_period=20, trend_period=trend_period)
+    # if ema_signal:
+    #     await send_hook(ticker=epic, hook_name=f"10/20/{trend_period}", direction=ema_signal, amount=amount, profit=profit, loss=loss, trail_sl=loss, strategy=True)
 
 
-        # order block
-        ob_signal  = order_block_signal(epic=epic, trend_period=trend_period, structure_lookback=25)
-        if ob_signal:
-            await send_hook(ticker=epic, hook_name="order block", direction=ob_signal, amount=amount, profit=profit, loss=loss, trail_sl=loss, session=session, strategy=True)
\ No newline at end of file
+    # order block
+    ob_signal  = order_block_signal(epic=epic, trend_period=trend_period, structure_lookback=25)
+    if ob_signal:
+        await send_hook(ticker=epic, hook_name="order block", direction=ob_signal, amount=amount, profit=profit, loss=loss, trail_sl=loss, strategy=True)
\ No newline at end of file
@@ -1,10 +1,24 @@
 from httpx import AsyncClient
+from typing import Callable, Optional
 from .simulator import SignalType
+from .dispatcher import WEBHOOK_URL, dispatcher
+from .latency import latency
 
+# When set, hooks are handed to this callable instead of being POSTed (used by replay)
+_recorder: Optional[Callable[[dict], None]] = None
 
-async def send_hook(ticker: str,  hook_name: str, direction: SignalType, amount: int, profit: int, loss: int, trail_sl: int, session: AsyncClient, mkt_closed: bool = True, recalibrate: bool = True, strategy: bool = False):
+
+def set_hook_recorder(recorder: Optional[Callable[[dict], None]]):
+    global _recorder
+    _recorder = recorder
+
+
+async def send_hook(ticker: str,  hook_name: str, direction: SignalType, amount: int, profit: int, loss: int, trail_sl: int, session: Optional[AsyncClient] = None, mkt_closed: bool = True, recalibrate: bool = True, strategy: bool = False):
+    """
+    Fire a trading webhook. Without a session the hook is queued on the shared dispatcher and
+    this returns immediately; with a session it is POSTed right away on that client.
+    """
     hook_name = hook_name.upper()        
-    url = "http://127.0.0.1:3556/webhook/trading-view"
     payload = {
         "epic": ticker,
         "direction": direction.value,
@@ -23,6 +37,12 @@ async def send_hook(ticker: str,  hook_name: str, direction: SignalType, amount:
         payload["exit_criteria"].append("RECALIBRATE")
     if strategy:
         payload["exit_criteria"].append("STRATEGY")
-    res = await session.post(url, json=payload)
+    if _recorder is not None:
+        _recorder(payload)
+        return
+    if session is None:
+        dispatcher.enqueue(payload, origin=latency.origin(ticker))
+        return
+    res = await session.post(WEBHOOK_URL, json=payload)
     print(f"{hook_name} Hook | {ticker}: {res.status_code} -> {direction.value} | TP: ${profit} | SL: ${loss} | Trail: ${trail_sl}")
 
@@ -0,0 +1,124 @@
+import time
+from collections import defaultdict
+from typing import Dict, Optional, Tuple
+
+now = time.perf_counter_ns  # monotonic, integer nanoseconds
+
+SUB_BITS = 5  # 32 linear sub-buckets per power of two: values kept to ~3% relative error
+
+
+def strategy_name(strategy) -> str:
+    """archive.get_latest_signal, event.strategies, ... for latency stage names."""
+    module = getattr(strategy, "__module__", None) or ""
+    name = getattr(strategy, "__name__", type(strategy).__name__)
+    return f"{module.rsplit('.', 1)[-1]}.{name}" if module else name
+
+
+class Histogram:
+    """
+    HDR-style log-linear histogram of microsecond values. Recording is a couple of integer
+    ops and a dict increment, so it can stay on in production; memory grows only with the
+    number of distinct buckets hit (a few hundred at most).
+    """
+
+    def __init__(self):
+        self.counts: Dict[int, int] = defaultdict(int)
+        self.count = 0
+        self.total = 0
+        self.max = 0
+
+    def record(self, micros: int):
+        if micros < 0:
+            micros = 0
+        shift = micros.bit_length() - SUB_BITS - 1
+        if shift < 0:
+            shift = 0
+        self.counts[(shift << SUB_BITS) + (micros >> shift)] += 1
+        self.count += 1
+        self.total += micros
+        if micros > self.max:
+            self.max = micros
+
+    @staticmethod
+    def _bucket_high(index: int) -> int:
+        shift = max(0, (index >> SUB_BITS) - 1)
+        return ((index - (shift << SUB_BITS) + 1) << shift) - 1
+
+    def percentile(self, q: float) -> int:
+        """Upper edge of the bucket holding the q-th percentile (capped at the exact max)."""
+        if not self.count:
+            return 0
+        rank = max(1, int(round(q / 100 * self.count)))
+        seen = 0
+        for index in sorted(self.counts):
+            seen += self.counts[index]
+            if seen >= rank:
+                return min(self._bucket_high(index), self.max)
+        return self.max
+
+    def summary(self) -> dict:
+        return {
+            "count": self.count,
+            "mean_ms": self.total / self.count / 1000 if self.count else 0.0,
+            "p50_ms": self.percentile(50) / 1000,
+            "p99_ms": self.percentile(99) / 1000,
+            "max_ms": self.max / 1000,
+        }
+
+
+class LatencyTracker:
+    """
+    Tick-to-webhook latency per (epic, stage), all on the monotonic perf_counter clock:
+      ingest            quote received in the socket -> its bar closed in Memory
+      queue_wait        bar closed -> strategy evaluation started
+      eval:<strategy>   one strategy's evaluation
+      hook:<HOOK>       send_hook queued -> webhook response
+      e2e:<HOOK>        quote received (or bar closed, in replays) -> webhook response
+    """
+
+    def __init__(self):
+        self.enabled = True
+        self.histograms: Dict[Tuple[str, str], Histogram] = defaultdict(Histogram)
+        self._received: Dict[str, int] = {}  # epic -> receive time of its latest quote
+        self._origin: Dict[str, int] = {}    # epic -> receive time of the quote that closed the latest bar
+        self._closed: Dict[str, int] = {}    # epic -> time its latest bar closed
+
+    def record(self, epic: str, stage: str, start_ns: int, end_ns: Optional[int] = None):
+        if self.enabled:
+            self.histograms[(epic, stage)].record(((end_ns or now()) - start_ns) // 1000)
+
+    def tick_received(self, epic: str, at_ns: int):
+        self._received[epic] = at_ns
+
+    def bar_closed(self, epic: str):
+        closed = now()
+        received = self._received.get(epic)
+        if received is not None:
+            self.record(epic, "ingest", received, closed)
+        self._origin[epic] = received if received is not None else closed
+        self._closed[epic] = closed
+
+    def origin(self, epic: str) -> Optional[int]:
+        """Receive time of the quote behind the latest bar close (end-to-end start)."""
+        return self._origin.get(epic)
+
+    def closed(self, epic: str) -> Optional[int]:
+        """Time the latest bar of `epic` closed (queue wait start)."""
+        return self._closed.get(epic)
+
+    def report(self) -> Dict[Tuple[str, str], dict]:
+        return {key: hist.summary() for key, hist in sorted(self.histograms.items())}
+
+    def print_report(self):
+        print(f"{'epic':<12} {'stage':<36} {'count':>8} {'p50 ms':>9} {'p99 ms':>9} {'max ms':>9}")
+        for (epic, stage), s in self.report().items():
+            print(f"{epic:<12} {stage:<36} {s['count']:>8} {s['p50_ms']:>9.3f} {s['p99_ms']:>9.3f} {s['max_ms']:>9.3f}")
+
+    def reset(self):
+        self.histograms.clear()
+        self._received.clear()
+        self._origin.clear()
+        self._closed.clear()
+
+
+latency = LatencyTracker()
@@ -0,0 +1,139 @@
+from collections import deque
+from typing import Callable, Dict, List, Tuple
+
+from analysis.indicators import LaggedSum, RollingSum, StreamingATR, StreamingEMA
+from .ring import RingBuffer
+
+
+def _typical_pv(bar: dict) -> float:
+    """Typical price x volume, the VWAP numerator."""
+    return (bar["high"] + bar["low"] + bar["close"]) / 3 * bar["volume"]
+
+# Derived per-bar values usable as rolling-sum inputs besides the raw bar fields
+DERIVED: Dict[str, Callable[[dict], float]] = {"pv": _typical_pv}
+
+
+class LiveIndicators:
+    """
+    Streaming indicator state of one epic, advanced once per closed bar by Memory.
+
+    An indicator is registered the first time a strategy asks for it: it is primed from the
+    bars already in the ring buffer, then updated in O(1) on every later bar close. Reads are
+    O(1), so signal evaluation no longer scales with the bar window length.
+    EMAs run over the full bar history from the moment they are registered.
+    """
+
+    def __init__(self, bars: RingBuffer):
+        self.bars = bars
+        self._states: Dict[tuple, object] = {}
+        self._updates: List[Callable[[dict], None]] = []
+
+    def on_bar(self):
+        """Advance every registered indicator with the bar just appended to the ring buffer."""
+        if not self._updates:
+            return
+        bar = self.bars[-1]
+        for update in self._updates:
+            update(bar)
+
+    def _make(self, key: tuple) -> Tuple[object, Callable[[dict], None]]:
+        """New indicator state for a registry key, with its per-bar update function."""
+        kind = key[0]
+        if kind == "ema":
+            _, period, seed, smoothing, field = key
+            state = StreamingEMA(period, seed, smoothing)
+            return state, lambda bar: state.update(bar[field])
+        if kind == "atr":
+            _, period, smoothing = key
+            state = StreamingATR(period, smoothing)
+            return state, lambda bar: state.update(bar["high"], bar["low"], bar["close"])
+        if kind == "sum":
+            _, field, window = key
+            state = RollingSum(window)
+            value = DERIVED.get(field, lambda bar: bar[field])
+            return state, lambda bar: state.update(value(bar))
+        if kind == "lagsum":
+            _, field, window, lag = key
+            state = LaggedSum(window, lag)
+            value = DERIVED.get(field, lambda bar: bar[field])
+            return state, lambda bar: state.update(value(bar))
+        raise ValueError(f"Unknown indicator {key!r}")
+
+    def _stream(self, key: tuple):
+        state = self._states.get(key)
+        if state is None:
+            state, update = self._make(key)
+            for bar in self.bars:
+                update(bar)
+            self._states[key] = state
+            self._updates.append(update)
+        return state
+
+    def ema(self, period: int, seed: str = "first", smoothing: str = "span", field: str = "close") -> float:
+        return self._stream(("ema", period, seed, smoothing, field)).value
+
+    def atr(self, period: int = 14, smoothing: str = "sma") -> float:
+        return self._stream(("atr", period, smoothing)).value
+
+    def rolling_sum(self, field: str, window: int, lag: int = 0) -> float:
+        """
+        Sum of `field` (a bar field or a DERIVED name) over the last `window` bars, or over the
+        `window` bars ending `lag` bars ago (NaN until that many bars exist).
+        """
+        if lag:
+            return self._stream(("lagsum", field, window, lag)).total
+        return self._stream(("sum", field, window)).total
+
+    def rolling_mean(self, field: str, window: int) -> float:
+        """Mean over the last `window` bars, NaN until that many bars exist."""
+        return self._stream(("sum", field, window)).mean
+
+    # --- snapshots ---
+    def export(self) -> List[list]:
+        """[key, attributes] of every registered indicator, JSON-serialisable (warm-start snapshots)."""
+        return [[list(key), _export(state)] for key, state in self._states.items()]
+
+    def restore(self, exported: List[list]):
+        """Re-register exported indicators as they were, without re-priming them from the bars."""
+        for key, attrs in exported:
+            key = tuple(key)
+            if key in self._states:
+                continue
+            state, update = self._make(key)
+            _import(state, attrs)
+            self._states[key] = state
+            self._updates.append(update)
+
+
+def _export(state) -> dict:
+    attrs = {}
+    for name, value in vars(state).items():
+        if isinstance(value, deque):
+            value = list(value)
+        elif hasattr(value, "__dict__"):
+            value = _export(value)
+        attrs[name] = value
+    return attrs
+
+def _import(state, attrs: dict):
+    for name, value in attrs.items():
+        current = getattr(state, name)
+        if isinstance(current, deque):
+            current.clear()
+            current.extend(value)
+        elif hasattr(current, "__dict__"):
+            _import(current, value)
+        else:
+            setattr(state, name, value)
+
+
+class IndicatorBook(dict):
+    """epic -> LiveIndicators over that epic's bars, created on first access."""
+
+    def __init__(self, bars: Dict[str, RingBuffer]):
+        super().__init__()
+        self.bars = bars
+
+    def __missing__(self, epic: str) -> LiveIndicators:
+        state = self[epic] = LiveIndicators(self.bars[epic])
+        return state
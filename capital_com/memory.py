@@ -1,26 +1,88 @@
-from .api import get_auth_header
-from collections import defaultdict, deque
-from typing import Deque, Dict, Tuple
+import math
+
+from .api import token_manager
+from . import simulator
+from .ring import RingBuffer
+from .bars import BAR_FIELDS, BarEngine
+from .live_indicators import IndicatorBook
+from .quote_recorder import quote_recorder
+from .evaluator import StrategyEvaluator
+from .latency import latency, now, strategy_name
+from collections import defaultdict
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+
+TICK_FIELDS = ("ask", "bid", "timestamp")
 
 class Memory:
     def __init__(self, bar_seconds=1001):
-        self.capital_auth_header: dict = {}
-        self.tick_history: Dict[str, Deque[dict]] = defaultdict(lambda: deque(maxlen=1000))
-        self.bars: Dict[str, Deque[dict]] = defaultdict(lambda: deque(maxlen=500))  # store 100 bars
-        self.bar_seconds = bar_seconds
+        # Coroutines run with the epic on every bar close; None -> archive.get_latest_signal
+        self.strategies: Optional[List[Callable[[str], Awaitable]]] = None
+        # When set, bar closes are queued to it instead of evaluated inline (live trading)
+        self.evaluator: Optional[StrategyEvaluator] = None
+        # Extra bar series (other time frames, tick and range bars) built from the same ticks
+        self.bar_engine: Optional[BarEngine] = None
+        # Set by snapshot.backfill: historical ticks build bars but are not traded, timed or evaluated
+        self.historical = False
+        # Set for REST-synthesized ticks: bars holding any get NaN volume (no real tick count)
+        self.synthetic = False
+        self.reset(bar_seconds)
+
+    def reset(self, bar_seconds=None):
+        """Drop all ticks, bars and prices, simulated positions and latency samples, e.g. before a replay."""
+        self.tick_history: Dict[str, RingBuffer] = defaultdict(lambda: RingBuffer(TICK_FIELDS, 1000))
+        self.bars: Dict[str, RingBuffer] = defaultdict(lambda: RingBuffer(BAR_FIELDS, 500))  # store 500 bars
+        # Streaming indicators per epic, advanced on every bar close (see LiveIndicators)
+        self.indicators = IndicatorBook(self.bars)
+        self.bar_seconds = bar_seconds or self.bar_seconds
         self.current_bar: Dict[str, dict] = {}
         self.last_price: Dict[str, Tuple[float, float]] = {}
+        if self.bar_engine is not None:
+            self.bar_engine.reset()
+        simulator.reset()
+        latency.reset()
+
+    @property
+    def capital_auth_header(self) -> dict:
+        """Current CST / X-SECURITY-TOKEN, shared with the REST calls (api.TokenManager)."""
+        return token_manager.auth_header
 
     async def update_auth_header(self):
-        self.capital_auth_header = await get_auth_header()
+        await token_manager.get()
 
     def get_last_price(self, epic: str) -> Tuple[float, float]:
         return self.last_price[epic]
 
+    async def evaluate(self, epic: str):
+        """Run the bar-close strategies of one epic."""
+        if self.strategies is None:
+            from .archive import get_latest_signal
+            strategies = [get_latest_signal]
+        else:
+            strategies = self.strategies
+
+        start = now()
+        closed = latency.closed(epic)
+        if closed is not None:
+            latency.record(epic, "queue_wait", closed, start)
+        for strategy in strategies:
+            await strategy(epic)
+            end = now()
+            latency.record(epic, f"eval:{strategy_name(strategy)}", start, end)
+            start = end
+
+    def start_evaluator(self, maxsize: int = 1) -> StrategyEvaluator:
+        """Move strategy evaluation onto per-epic worker tasks fed by conflating queues."""
+        self.evaluator = StrategyEvaluator(self.evaluate, maxsize=maxsize)
+        return self.evaluator
+
     async def append_tick_data(self, epic: str, ask: float, bid: float, timestamp: int):
         # Store last price
         self.last_price[epic] = (ask, bid)
 
+        # Advance simulated orders on this epic
+        if not self.historical:
+            simulator.on_tick(epic, ask, bid)
+
         # Normalize timestamp to seconds if in ms
         if timestamp > 1e12:  # likely milliseconds
             ts_sec = timestamp / 1000.0
@@ -30,6 +92,9 @@ class Memory:
         mid = (ask + bid) / 2.0
         spread = ask - bid
 
+        if self.bar_engine is not None:
+            await self.bar_engine.on_tick(epic, ask, bid, ts_sec)
+
         # Initialize current bar if needed
         if epic not in self.current_bar:
             self.current_bar[epic] = {
@@ -41,6 +106,8 @@ class Memory:
                 "spread_sum": spread,
                 "tick_count": 1
             }
+            if self.synthetic:
+                self.current_bar[epic]["synthetic"] = True
         else:
             cb = self.current_bar[epic]
             cb["high"] = max(cb["high"], ask)
@@ -48,26 +115,31 @@ class Memory:
             cb["close"] = mid
             cb["spread_sum"] += spread
             cb["tick_count"] += 1
+            if self.synthetic:
+                cb["synthetic"] = True
 
             # Close bar if duration exceeded
             if ts_sec - cb["start_time"] >= self.bar_seconds:
-                bar = {
-                    "open": cb["open"],
-                    "high": cb["high"],
-                    "low": cb["low"],
-                    "close": cb["close"],
-                    "start_time": cb["start_time"],
-                    "end_time": ts_sec,
-                    "avg_spread": cb["spread_sum"] / cb["tick_count"],
-                    "volume": cb["tick_count"],
-                }
-                self.bars[epic].append(bar)
-                
+                self.bars[epic].append(
+                    cb["open"],
+                    cb["high"],
+                    cb["low"],
+                    cb["close"],
+                    cb["start_time"],
+                    ts_sec,
+                    cb["spread_sum"] / cb["tick_count"],
+                    cb["tick_count"] if "synthetic" not in cb else math.nan,
+                )
+                if epic in self.indicators:
+                    self.indicators[epic].on_bar()
+
                 # Check for trading signals
-                # from .event import strategies
-                from .archive import get_latest_signal
-                # await strategies(epic)
-                await get_latest_signal(epic)
+                if not self.historical:
+                    latency.bar_closed(epic)
+                    if self.evaluator is not None:
+                        self.evaluator.submit(epic)
+                    else:
+                        await self.evaluate(epic)
 
                 # Start new bar
                 self.current_bar[epic] = {
@@ -80,14 +152,12 @@ class Memory:
                     "tick_count": 1
                 }
 
-        self.tick_history[epic].append({"ask": ask, "bid": bid, "timestamp": timestamp})
+        self.tick_history[epic].append(ask, bid, timestamp)
 
     
     def log_quotes(self, epic: str, ask: float, ask_size: float, bid: float, bid_size: float, timestamp: int):
-        with open(f"./Quotes/{epic}_quotes.csv", "a") as f:
-            if f.tell() == 0:
-                f.write("timestamp,ask,ask_size,bid,bid_size\n")
-            f.write(f"{timestamp},{ask},{ask_size},{bid},{bid_size}\n")
+        # Buffered; written to ./Quotes/{epic}_quotes_{day}.csv by the recorder's flush thread
+        quote_recorder.record(epic, ask, ask_size, bid, bid_size, timestamp)
 
 
 
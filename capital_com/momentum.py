@@ -7,41 +7,6 @@ class SignalType(Enum):
     SELL = "SELL"
     NONE = "NONE"
 
-def compute_ema(prices: List[float], period: int) -> Optional[float]:
-    if prices is None or len(prices) < period:
-        return None
-    k = 2.0 / (period + 1)
-    # seed with simple MA of first `period` values
-    seed = sum(prices[:period]) / period
-    ema = seed
-    for p in prices[period:]:
-        ema = p * k + ema * (1 - k)
-    return ema
-
-def compute_atr(bars: List[dict], period: int = 14) -> Optional[float]:
-    if bars is None or len(bars) < period + 1:
-        return None
-    trs = []
-    # need a list of TRs for bars[-period-? .. -1]
-    start = len(bars) - (period + 1)
-    for i in range(start + 1, len(bars)):
-        cur = bars[i]
-        prev = bars[i - 1]
-        high = cur["high"]
-        low = cur["low"]
-        prev_close = prev["close"]
-        tr = max(high - low, abs(high - prev_close), abs(low - prev_close))
-        trs.append(tr)
-    # simple SMA of TRs then smooth into ATR via Wilder's EMA
-    if len(trs) < period:
-        return None
-    # wilder's ATR: first value = sma, subsequent = (prev_atr*(n-1)+tr)/n
-    sma = sum(trs[:period]) / period
-    atr = sma
-    for tr in trs[period:]:
-        atr = (atr * (period - 1) + tr) / period
-    return atr
-
 def momentum_punch_signal(
     epic: str,
     atr_period: int = 14,
@@ -68,12 +33,9 @@ def momentum_punch_signal(
     setup = bars[-2]
     confirm = bars[-1]
 
-    closes = [b["close"] for b in bars]
-    slow_trend = compute_ema(closes, trend_period)
-    atr = compute_atr(list(bars), atr_period)
-
-    if slow_trend is None or atr is None:
-        return None
+    indicators = memory.indicators[epic]
+    slow_trend = indicators.ema(trend_period, seed="sma")
+    atr = indicators.atr(atr_period)
 
     # Impulse metrics
     imp_high = impulse["high"]
@@ -119,14 +81,14 @@ def momentum_punch_signal(
         if confirm["close"] <= imp_high:
             return None
         # trend filter: slow_trend must agree (price above slow_trend)
-        if closes[-1] <= slow_trend:
+        if confirm["close"] <= slow_trend:
             return None
         return SignalType.BUY
 
     if bearish_impulse:
         if confirm["close"] >= imp_low:
             return None
-        if closes[-1] >= slow_trend:
+        if confirm["close"] >= slow_trend:
             return None
         return SignalType.SELL
 
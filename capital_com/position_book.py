@@ -0,0 +1,209 @@
+import heapq, itertools
+from typing import List, Optional
+
+NEG_INF = float("-inf")
+
+# Tie-breaker so heap entries never compare positions
+_seq = itertools.count()
+
+
+class Position:
+    """
+    Trigger levels of one order, stored in "long space": SELL levels and prices are negated
+    so both sides share the BUY rules (enter at x >= entry, TP at x >= tp, stop at x <= stop).
+    """
+    __slots__ = ("order", "entry", "tp", "sl", "offset", "group", "closed")
+
+    def __init__(self, order, entry: float, tp: float, sl: float, offset: float):
+        self.order = order
+        self.entry = entry
+        self.tp = tp
+        self.sl = sl
+        self.offset = offset
+        self.group: Optional["_TrailGroup"] = None
+        self.closed = False
+
+
+class _TrailGroup:
+    """Positions sharing the same peak since entry; their trail stops are peak - offset."""
+    __slots__ = ("peak", "heap", "version")
+
+    def __init__(self, peak: float):
+        self.peak = peak
+        self.heap = []  # (offset, seq, position): smallest offset = highest trail stop
+        self.version = 0
+
+
+class _SideBook:
+    def __init__(self, sign: int):
+        self.sign = sign
+        self.pending = []  # (entry, seq, position)      min-heap: lowest entry triggers first
+        self.tps = []      # (tp, seq, position)         min-heap: lowest TP triggers first
+        self.sls = []      # (-sl, seq, position)        highest fixed SL triggers first
+        self.stops = []    # (-stop, seq, version, group) highest trail stop per group first
+        # Trail groups from oldest to newest entries; peaks strictly decrease towards the top
+        self.groups: List[_TrailGroup] = []
+        self.live = 0
+        self.dead = 0
+
+    # --- trailing groups ---
+    def _push_stop(self, group: _TrailGroup):
+        group.version += 1
+        heap = group.heap
+        while heap and heap[0][2].closed:
+            heapq.heappop(heap)
+        if heap and group.peak != NEG_INF:
+            heapq.heappush(self.stops, (heap[0][0] - group.peak, next(_seq), group.version, group))
+
+    @staticmethod
+    def _merge(a: _TrailGroup, b: _TrailGroup) -> _TrailGroup:
+        if len(a.heap) < len(b.heap):
+            a, b = b, a
+        for item in b.heap:
+            item[2].group = a
+            heapq.heappush(a.heap, item)
+        b.heap = []
+        b.version += 1  # drop b's stop entries
+        return a
+
+    def _enter(self, pos: Position):
+        # Trailing starts on the next tick: park it in a group whose peak is still -inf
+        if not self.groups or self.groups[-1].peak != NEG_INF:
+            self.groups.append(_TrailGroup(NEG_INF))
+        group = self.groups[-1]
+        pos.group = group
+        heapq.heappush(group.heap, (pos.offset, next(_seq), pos))
+        heapq.heappush(self.tps, (pos.tp, next(_seq), pos))
+        heapq.heappush(self.sls, (-pos.sl, next(_seq), pos))
+        pos.order.on_entry()
+
+    def _close(self, pos: Position, reason: str, level: float, price: float):
+        pos.closed = True
+        self.live -= 1
+        self.dead += 1
+        pos.order.on_exit(reason, level - pos.entry, price)
+
+    def _close_at_stop(self, pos: Position, price: float):
+        trail = pos.group.peak - pos.offset
+        if trail > pos.sl:
+            self._close(pos, "TrailSL", trail, price)
+        else:
+            self._close(pos, "SL", pos.sl, price)
+
+    # --- public ---
+    def add(self, order, entry: float, tp: float, sl: float, offset: float, x: Optional[float]) -> Position:
+        s = self.sign
+        pos = Position(order, s * entry, s * tp, s * sl, offset)
+        self.live += 1
+        if x is not None and x >= pos.entry:
+            self._enter(pos)
+        else:
+            heapq.heappush(self.pending, (pos.entry, next(_seq), pos))
+        return pos
+
+    def cancel(self, pos: Position):
+        if not pos.closed:
+            pos.closed = True
+            self.live -= 1
+            self.dead += 1
+
+    def on_tick(self, x: float, price: float):
+        # 1. Lazy trailing: every group whose peak is below x now peaks at x (one merged group)
+        groups = self.groups
+        if groups and groups[-1].peak <= x:
+            merged = groups.pop()
+            while groups and groups[-1].peak <= x:
+                merged = self._merge(merged, groups.pop())
+            merged.peak = x
+            groups.append(merged)
+            self._push_stop(merged)
+
+        # 2. Take profit (checked before stops, like the per-order rule)
+        tps = self.tps
+        while tps and tps[0][0] <= x:
+            pos = heapq.heappop(tps)[2]
+            if not pos.closed:
+                self._close(pos, "TP", pos.tp, price)
+
+        # 3. Fixed stop loss
+        sls = self.sls
+        while sls and -sls[0][0] >= x:
+            pos = heapq.heappop(sls)[2]
+            if not pos.closed:
+                self._close_at_stop(pos, price)
+
+        # 4. Trailing stops, one group at a time
+        stops = self.stops
+        while stops:
+            neg_stop, _, version, group = stops[0]
+            if version != group.version:
+                heapq.heappop(stops)
+                continue
+            if -neg_stop < x:
+                break
+            heapq.heappop(stops)
+            heap = group.heap
+            while heap and (heap[0][2].closed or group.peak - heap[0][0] >= x):
+                pos = heapq.heappop(heap)[2]
+                if not pos.closed:
+                    self._close_at_stop(pos, price)
+            self._push_stop(group)
+
+        # 5. Pending entries; they are exit-checked from the next tick on
+        pending = self.pending
+        while pending and pending[0][0] <= x:
+            pos = heapq.heappop(pending)[2]
+            if not pos.closed:
+                self._enter(pos)
+
+        if self.dead > self.live + 1024:
+            self._compact()
+
+    def _compact(self):
+        """Drop closed positions that are still sitting in heaps nobody has popped yet."""
+        self.pending = [e for e in self.pending if not e[2].closed]
+        self.tps = [e for e in self.tps if not e[2].closed]
+        self.sls = [e for e in self.sls if not e[2].closed]
+        for heap in (self.pending, self.tps, self.sls):
+            heapq.heapify(heap)
+        self.groups = [g for g in self.groups if g.heap]
+        for group in self.groups:
+            group.heap = [e for e in group.heap if not e[2].closed]
+            heapq.heapify(group.heap)
+        self.groups = [g for g in self.groups if g.heap]
+        self.stops = []
+        for group in self.groups:
+            self._push_stop(group)
+        self.dead = 0
+
+
+class PositionBook:
+    """
+    Simulated positions of one epic. Entry, TP, fixed SL and trailing SL levels live in heaps
+    per side, so a tick only touches the positions whose levels it actually crossed.
+    BUY orders trade on the ask, SELL orders on the bid.
+    """
+
+    def __init__(self):
+        self.buy = _SideBook(1)
+        self.sell = _SideBook(-1)
+        self.last: Optional[tuple] = None
+
+    def __len__(self):
+        return self.buy.live + self.sell.live
+
+    def add(self, order, is_buy: bool, entry: float, tp: float, sl: float, trail_offset: float) -> Position:
+        """Register an order; the latest tick (if any) may already trigger its entry."""
+        if is_buy:
+            return self.buy.add(order, entry, tp, sl, trail_offset, self.last[0] if self.last else None)
+        return self.sell.add(order, entry, tp, sl, trail_offset, -self.last[1] if self.last else None)
+
+    def cancel(self, pos: Position):
+        (self.buy if pos.order.is_buy else self.sell).cancel(pos)
+
+    def on_tick(self, ask: float, bid: float):
+        self.last = (ask, bid)
+        if self.buy.live:
+            self.buy.on_tick(ask, ask)
+        if self.sell.live:
+            self.sell.on_tick(-bid, bid)
@@ -0,0 +1,211 @@
+import atexit, logging, os, threading, time
+from collections import defaultdict
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, TextIO, Tuple
+
+import numpy as np
+
+from .tick_store import TICK_DTYPE, TickStore
+
+DAY_MS = 86_400_000
+HEADER = "timestamp,ask,ask_size,bid,bid_size\n"
+
+log = logging.getLogger(__name__)
+
+
+class QuoteRecorder:
+    """
+    Buffered quote logger. `record` only appends the quote to an in-memory batch, so the
+    event loop never touches the disk. A background thread writes the batches every
+    `flush_interval` seconds (or sooner once `max_rows` are pending) through long-lived
+    per-epic handles, one file per epic per UTC day: {directory}/{epic}_quotes_{YYYY-MM-DD}.csv
+    With a TickStore, batches also go to its binary day segments (csv=False writes only those).
+    Batches a flush fails to write are kept and retried on the next flush, only for the sinks
+    (CSV / store) they have not reached yet; beyond `max_retry_rows` the oldest are dropped.
+    """
+
+    def __init__(
+        self,
+        directory: str = "./Quotes",
+        flush_interval: float = 1.0,
+        max_rows: int = 5_000,
+        store: Optional[TickStore] = None,
+        csv: bool = True,
+        max_retry_rows: int = 1_000_000,
+    ):
+        self.directory = directory
+        self.flush_interval = flush_interval
+        self.max_rows = max_rows
+        self.store = store
+        self.csv = csv
+        self.max_retry_rows = max_retry_rows
+
+        self._lock = threading.Lock()        # guards the pending batches
+        self._io_lock = threading.Lock()     # one flusher at a time
+        self._pending: Dict[Tuple[str, int], List[tuple]] = defaultdict(list)
+        self._pending_rows = 0
+        self._retry: List[Tuple[Tuple[str, int], List[tuple], bool, bool]] = []  # (key, quotes, csv, store) left from a failed flush
+        self._handles: Dict[str, Tuple[int, TextIO]] = {}  # epic -> (day, file)
+
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._atexit = False
+
+        self.rows_written = 0
+        self.bytes_written = 0
+        self.flushes = 0
+        self.flush_seconds = 0.0
+        self.max_flush_seconds = 0.0
+        self.errors = 0
+        self.dropped_rows = 0
+        self.last_error: Optional[str] = None
+
+    def start(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="quote-recorder", daemon=True)
+            self._thread.start()
+            if not self._atexit:
+                atexit.register(self.close)
+                self._atexit = True
+
+    def record(self, epic: str, ask: float, ask_size: float, bid: float, bid_size: float, timestamp: int):
+        """Queue one quote; cheap enough to call on every tick from the event loop."""
+        if self._thread is None:
+            self.start()
+        day = int(timestamp if timestamp > 1e12 else timestamp * 1000) // DAY_MS
+        with self._lock:
+            self._pending[(epic, day)].append((timestamp, ask, ask_size, bid, bid_size))
+            self._pending_rows += 1
+            full = self._pending_rows >= self.max_rows
+        if full:
+            self._wake.set()
+
+    def _run(self):
+        while not self._stop.is_set():
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            self.flush()
+
+    def _handle(self, epic: str, day: int) -> TextIO:
+        current = self._handles.get(epic)
+        if current is not None and current[0] == day:
+            return current[1]
+        if current is not None:
+            current[1].close()  # day rolled over
+
+        date = datetime.fromtimestamp(day * 86_400, tz=timezone.utc).strftime("%Y-%m-%d")
+        os.makedirs(self.directory, exist_ok=True)
+        f = open(os.path.join(self.directory, f"{epic}_quotes_{date}.csv"), "a")
+        if f.tell() == 0:
+            f.write(HEADER)
+        self._handles[epic] = (day, f)
+        return f
+
+    def flush(self):
+        """Write every pending batch to disk (one write per epic and day)."""
+        with self._lock:
+            if not self._pending_rows:
+                return
+            pending, rows = self._pending, self._pending_rows
+            self._pending, self._pending_rows = defaultdict(list), 0
+            retry, self._retry = self._retry, []
+
+        with self._io_lock:
+            start = time.perf_counter()
+            written = 0
+            # Retried batches first: they are older than anything recorded since
+            work = retry + [(key, quotes, self.csv, self.store is not None) for key, quotes in pending.items()]
+            work.sort(key=lambda item: item[0][1])
+            done = 0
+            try:
+                for k, ((epic, day), quotes, csv, store) in enumerate(work):
+                    if csv:
+                        f = self._handle(epic, day)
+                        chunk = "".join(f"{t},{a},{a_size},{b},{b_size}\n" for t, a, a_size, b, b_size in quotes)
+                        f.write(chunk)
+                        f.flush()
+                        written += len(chunk)
+                        work[k] = ((epic, day), quotes, False, store)
+                    if store:
+                        self.store.append(epic, np.array(quotes, dtype=TICK_DTYPE))
+                        written += len(quotes) * TICK_DTYPE.itemsize
+                        work[k] = ((epic, day), quotes, False, False)
+                    done = k + 1
+                if self.store is not None:
+                    self.store.flush()
+            except Exception as e:
+                self.rows_written += rows - self._failed(work[done:], e)
+                return
+
+            elapsed = time.perf_counter() - start
+            self.rows_written += rows
+            self.bytes_written += written
+            self.flushes += 1
+            self.flush_seconds += elapsed
+            self.max_flush_seconds = max(self.max_flush_seconds, elapsed)
+
+    def _failed(self, left: list, error: Exception) -> int:
+        """
+        Keep the batches a flush did not finish for the next one (the newest `max_retry_rows`
+        quotes), and drop their (maybe broken) file handles. Returns the rows not written.
+        """
+        for (epic, _), _, csv, _ in left:
+            current = self._handles.pop(epic, None) if csv else None
+            if current is not None:
+                try:
+                    current[1].close()
+                except OSError:
+                    pass
+        unwritten = kept = sum(len(quotes) for _, quotes, _, _ in left)
+        while kept > self.max_retry_rows:
+            key, quotes, csv, store = left[0]
+            excess = kept - self.max_retry_rows
+            if len(quotes) <= excess:
+                left.pop(0)
+                kept -= len(quotes)
+            else:
+                left[0] = (key, quotes[excess:], csv, store)
+                kept -= excess
+        with self._lock:
+            self._retry = left
+            self._pending_rows += kept
+        self.dropped_rows += unwritten - kept
+        self.errors += 1
+        self.last_error = f"{type(error).__name__}: {error}"
+        log.error("Quote recorder flush error, %d rows kept for retry, %d dropped: %s", kept, unwritten - kept, self.last_error)
+        return unwritten
+
+    def close(self):
+        """Stop the flusher, write what is left and close every file."""
+        self._stop.set()
+        self._wake.set()
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join()
+        self._thread = None
+        self.flush()
+        with self._io_lock:
+            for _, f in self._handles.values():
+                f.close()
+            self._handles.clear()
+            if self.store is not None:
+                self.store.close()
+
+    def stats(self) -> dict:
+        with self._lock:
+            pending = self._pending_rows
+        return {
+            "rows_written": self.rows_written,
+            "bytes_written": self.bytes_written,
+            "pending_rows": pending,
+            "flushes": self.flushes,
+            "avg_flush_ms": self.flush_seconds / self.flushes * 1000 if self.flushes else 0.0,
+            "max_flush_ms": self.max_flush_seconds * 1000,
+            "errors": self.errors,
+            "dropped_rows": self.dropped_rows,
+            "last_error": self.last_error,
+        }
+
+
+quote_recorder = QuoteRecorder()
@@ -0,0 +1,105 @@
+import asyncio, glob, hashlib, json, os, time
+from typing import Awaitable, Callable, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from . import clock
+from .hook import set_hook_recorder
+from .memory import memory
+
+
+class HookRecorder:
+    """Collects hook payloads in-process, stamped with the virtual time they fired at."""
+
+    def __init__(self):
+        self.hooks: List[dict] = []
+
+    def __call__(self, payload: dict):
+        self.hooks.append({"time": clock.time(), **payload})
+
+    def to_frame(self) -> pd.DataFrame:
+        return pd.DataFrame(self.hooks)
+
+    def digest(self) -> str:
+        """SHA-256 over every recorded hook; equal digests mean bit-identical replays."""
+        h = hashlib.sha256()
+        for hook in self.hooks:
+            h.update(json.dumps(hook, sort_keys=True).encode())
+            h.update(b"\n")
+        return h.hexdigest()
+
+
+def epic_from_path(path: str) -> str:
+    """./Quotes/CFD/GOLD_quotes.csv or ./Quotes/GOLD_quotes_2026-01-15.csv -> GOLD"""
+    return os.path.basename(path).split("_quotes")[0]
+
+
+def load_ticks(paths: List[str]):
+    """
+    Merge quote files (written by Memory.log_quotes) into one time-ordered stream.
+    Ties keep file order, so the merge is deterministic.
+    Returns (epics, timestamps, asks, bids) as Python lists ready for the replay loop.
+    """
+    epics, frames = [], []
+    for k, path in enumerate(sorted(paths)):
+        df = pd.read_csv(path, usecols=["timestamp", "ask", "bid"], dtype={"timestamp": "int64", "ask": "float64", "bid": "float64"})
+        df["epic"] = k
+        epics.append(epic_from_path(path))
+        frames.append(df)
+
+    ticks = pd.concat(frames, ignore_index=True)
+    order = np.argsort(ticks["timestamp"].to_numpy(), kind="stable")
+    ticks = ticks.iloc[order]
+    names = np.array(epics, dtype=object)[ticks["epic"].to_numpy()]
+    return names.tolist(), ticks["timestamp"].tolist(), ticks["ask"].tolist(), ticks["bid"].tolist()
+
+
+async def replay(
+    paths: List[str],
+    bar_seconds: int = 1001,
+    strategies: Optional[List[Callable[[str], Awaitable]]] = None,
+) -> HookRecorder:
+    """
+    Stream recorded quotes through Memory.append_tick_data on a virtual clock.
+    Hooks fired by the strategies (default: archive.get_latest_signal and event.strategies)
+    are recorded in-process instead of being sent to the webhook server.
+    Memory is reset before the run so every replay of the same files gives the same hooks.
+    Strategies run inline on each bar close (no evaluator queue) to keep replays deterministic.
+    """
+    if strategies is None:
+        from .archive import get_latest_signal
+        from .event import strategies as event_strategies
+        strategies = [get_latest_signal, event_strategies]
+
+    epics, timestamps, asks, bids = load_ticks(paths)
+    recorder = HookRecorder()
+    saved_strategies, saved_evaluator = memory.strategies, memory.evaluator
+
+    memory.reset(bar_seconds)
+    memory.strategies = strategies
+    memory.evaluator = None
+    set_hook_recorder(recorder)
+    start = time.perf_counter()
+    try:
+        append = memory.append_tick_data
+        for epic, ts, ask, bid in zip(epics, timestamps, asks, bids):
+            clock.set_virtual_time(ts / 1000.0 if ts > 1e12 else float(ts))
+            await append(epic, ask, bid, ts)
+    finally:
+        elapsed = time.perf_counter() - start
+        clock.set_virtual_time(None)
+        set_hook_recorder(None)
+        memory.strategies, memory.evaluator = saved_strategies, saved_evaluator
+
+    rate = len(timestamps) / elapsed * 60 if elapsed else float("inf")
+    print(f"Replay complete: {len(timestamps)} ticks in {elapsed:.2f}s ({rate:,.0f} ticks/min) | {len(recorder.hooks)} hooks")
+    return recorder
+
+
+
+if __name__ == "__main__":
+    paths = glob.glob("./Quotes/CFD/*_quotes*.csv")
+    recorder = asyncio.run(replay(paths, bar_seconds=30))
+    print(recorder.to_frame())
+    print(f"Digest: {recorder.digest()}")
@@ -0,0 +1,234 @@
+import glob, time
+from typing import Iterator, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from .bars import BAR_FIELDS
+from .tick_store import TickStore
+
+CHUNK_TICKS = 1_000_000
+
+
+def _seconds(timestamps: np.ndarray) -> np.ndarray:
+    """Memory's timestamp normalisation: epoch ms -> seconds, seconds kept as they are."""
+    timestamps = np.asarray(timestamps)
+    return np.where(timestamps > 1e12, timestamps / 1000.0, timestamps.astype(np.float64))
+
+
+def _closes(ts: np.ndarray, seconds: float) -> List[int]:
+    """
+    Indices of the ticks that close bars, with the first bar opening at ts[0]: the first tick
+    j after a bar's opening tick i with ts[j] - ts[i] >= seconds, which then opens the next bar.
+    """
+    n = len(ts)
+    if n > 1 and (ts[1:] >= ts[:-1]).all():
+        # Sorted: candidate for every tick by binary search, then fixed up to the exact float test
+        index = np.arange(n)
+        nxt = np.maximum(np.searchsorted(ts, ts + seconds, side="left"), index + 1)
+        while True:
+            earlier = np.maximum(nxt - 1, index + 1)
+            mask = (earlier < nxt) & (ts[np.minimum(earlier, n - 1)] - ts >= seconds)
+            if not mask.any():
+                break
+            nxt[mask] = earlier[mask]
+        while True:
+            mask = (nxt < n) & (ts[np.minimum(nxt, n - 1)] - ts < seconds)
+            if not mask.any():
+                break
+            nxt[mask] += 1
+        nxt = nxt.tolist()
+        closes, i = [], 0
+        while nxt[i] < n:
+            i = nxt[i]
+            closes.append(i)
+        return closes
+
+    # Out-of-order timestamps: scan tick by tick like Memory does
+    closes, start = [], ts[0] if n else 0.0
+    for j, t in enumerate(ts.tolist()[1:], 1):
+        if t - start >= seconds:
+            closes.append(j)
+            start = t
+    return closes
+
+
+def _segment_sums(values: np.ndarray, starts: np.ndarray, lengths: np.ndarray, short: int = 256) -> np.ndarray:
+    """
+    Sum of values[start:start + length] per segment, added left to right like Memory's running
+    spread_sum (so results are bit-identical; np.add.reduceat sums pairwise). Segments up to
+    `short` ticks loop over the position within the bar, vectorized across all bars still that
+    long; longer ones get one sequential np.add.accumulate each, so cost stays linear in ticks.
+    """
+    sums = values[starts].copy()
+    if not len(starts):
+        return sums
+    long = lengths > short
+    for k in np.flatnonzero(long).tolist():
+        sums[k] = np.add.accumulate(values[starts[k]:starts[k] + lengths[k]])[-1]
+    rest = np.flatnonzero(~long)
+    order = rest[np.argsort(-lengths[rest], kind="stable")]
+    longest_first = -lengths[order]
+    for m in range(1, int(-longest_first[0]) if len(order) else 0):
+        active = order[:np.searchsorted(longest_first, -m, side="left")]
+        sums[active] += values[starts[active] + m]
+    return sums
+
+
+class TickResampler:
+    """
+    Vectorized equivalent of Memory's live bar building for one epic's quotes.
+
+    `update` takes the next chunk of (timestamps, asks, bids) and returns the bars it closed,
+    (BAR_FIELDS, n), with the same floats Memory would append: the closing tick counts in both
+    the closed and the new bar, high/low are the max ask/min bid, open/close are mids,
+    avg_spread the running spread sum over the tick count and volume the tick count.
+    The open bar is carried between chunks in `current`, in Memory.current_bar's format.
+    """
+
+    def __init__(self, bar_seconds: float = 1001):
+        self.bar_seconds = bar_seconds
+        self.current: Optional[dict] = None
+
+    def update(self, timestamps, asks, bids) -> np.ndarray:
+        ts = _seconds(timestamps)
+        asks = np.asarray(asks, dtype=np.float64)
+        bids = np.asarray(bids, dtype=np.float64)
+        if not len(ts):
+            return np.empty((len(BAR_FIELDS), 0))
+        mid = (asks + bids) / 2.0
+        spread = asks - bids
+
+        carry = self.current
+        if carry is not None:
+            # The open bar becomes a virtual first tick holding its aggregates
+            ts = np.concatenate(([carry["start_time"]], ts))
+            asks = np.concatenate(([carry["high"]], asks))
+            bids = np.concatenate(([carry["low"]], bids))
+            mid = np.concatenate(([carry["open"]], mid))
+            spread = np.concatenate(([carry["spread_sum"]], spread))
+
+        n = len(ts)
+        closes = np.array(_closes(ts, self.bar_seconds), dtype=np.int64)
+        starts = np.concatenate(([0], closes))        # opening tick of every bar, the last still open
+        ends = np.concatenate((closes, [n - 1]))       # inclusive last tick
+        lengths = ends - starts + 1
+
+        high = np.maximum.reduceat(asks, starts)
+        low = np.minimum.reduceat(bids, starts)
+        high[:-1] = np.maximum(high[:-1], asks[closes])
+        low[:-1] = np.minimum(low[:-1], bids[closes])
+        spread_sum = _segment_sums(spread, starts, lengths)
+        count = lengths.astype(np.float64)
+        if carry is not None:
+            count[0] += carry["tick_count"] - 1
+
+        self.current = {
+            "open": float(mid[starts[-1]]),
+            "high": float(high[-1]),
+            "low": float(low[-1]),
+            "close": float(mid[-1]),
+            "start_time": float(ts[starts[-1]]),
+            "spread_sum": float(spread_sum[-1]),
+            "tick_count": int(count[-1]),
+        }
+
+        k = len(closes)
+        return np.vstack([
+            mid[starts[:k]],
+            high[:k],
+            low[:k],
+            mid[closes],
+            ts[starts[:k]],
+            ts[closes],
+            spread_sum[:k] / count[:k],
+            count[:k],
+        ])
+
+
+def _frame(parts: List[np.ndarray]) -> pd.DataFrame:
+    data = np.hstack(parts) if parts else np.empty((len(BAR_FIELDS), 0))
+    return pd.DataFrame(dict(zip(BAR_FIELDS, data)))
+
+
+def iter_tick_bars(source, bar_seconds: float = 1001, chunksize: int = CHUNK_TICKS, epic: Optional[str] = None) -> Iterator[np.ndarray]:
+    """
+    Closed bars, chunk by chunk, from a quote CSV path (timestamp,ask,...,bid,...) or from a
+    TickStore (with `epic`), read `chunksize` ticks at a time so memory stays flat.
+    """
+    resampler = TickResampler(bar_seconds)
+    if isinstance(source, TickStore):
+        for chunk in source.chunks(epic, chunksize):
+            yield resampler.update(chunk["timestamp"], chunk["ask"], chunk["bid"])
+        return
+    reader = pd.read_csv(source, usecols=["timestamp", "ask", "bid"], chunksize=chunksize,
+                         dtype={"timestamp": "int64", "ask": "float64", "bid": "float64"})
+    for chunk in reader:
+        yield resampler.update(chunk["timestamp"].to_numpy(), chunk["ask"].to_numpy(), chunk["bid"].to_numpy())
+
+
+def resample_ticks(source, bar_seconds: float = 1001, chunksize: int = CHUNK_TICKS, epic: Optional[str] = None) -> pd.DataFrame:
+    """All closed bars of a quote file or TickStore epic as a DataFrame with BAR_FIELDS columns."""
+    return _frame(list(iter_tick_bars(source, bar_seconds, chunksize, epic)))
+
+
+class OHLCResampler:
+    """
+    Aggregates OHLC rows (data/{epic}_{resolution}.csv) into coarser clock-aligned bars:
+    every `bar_seconds` bucket since the epoch is one bar. start_time is the bucket start,
+    end_time the next bucket start, volume the number of source rows; there are no quotes,
+    so avg_spread is NaN. The unfinished last bucket is carried between chunks.
+    """
+
+    def __init__(self, bar_seconds: float):
+        self.bar_seconds = bar_seconds
+        self._carry: Optional[np.ndarray] = None  # (5, rows) of the open bucket
+
+    def update(self, timestamps, opens, highs, lows, closes, final: bool = False) -> np.ndarray:
+        rows = np.vstack([_seconds(timestamps), opens, highs, lows, closes]).astype(np.float64)
+        if self._carry is not None:
+            rows = np.hstack([self._carry, rows])
+            self._carry = None
+        if not rows.shape[1]:
+            return np.empty((len(BAR_FIELDS), 0))
+
+        bucket = np.floor(rows[0] / self.bar_seconds)
+        starts = np.flatnonzero(np.concatenate(([True], bucket[1:] != bucket[:-1])))
+        if not final:
+            self._carry = rows[:, starts[-1]:]
+            rows, bucket, starts = rows[:, :starts[-1]], bucket[:starts[-1]], starts[:-1]
+        if not len(starts):
+            return np.empty((len(BAR_FIELDS), 0))
+
+        lasts = np.concatenate((starts[1:], [rows.shape[1]])) - 1
+        start_time = bucket[starts] * self.bar_seconds
+        return np.vstack([
+            rows[1, starts],
+            np.maximum.reduceat(rows[2], starts),
+            np.minimum.reduceat(rows[3], starts),
+            rows[4, lasts],
+            start_time,
+            start_time + self.bar_seconds,
+            np.full(len(starts), np.nan),
+            (lasts - starts + 1).astype(np.float64),
+        ])
+
+
+def resample_ohlc(path: str, bar_seconds: float, chunksize: int = CHUNK_TICKS) -> pd.DataFrame:
+    """Coarser bars from a save_ohlc_data CSV (timestamp,open,high,low,close; UTC ISO times)."""
+    resampler = OHLCResampler(bar_seconds)
+    parts = []
+    for chunk in pd.read_csv(path, chunksize=chunksize):
+        timestamps = pd.to_datetime(chunk["timestamp"], utc=True).dt.as_unit("ms").astype("int64").to_numpy()
+        parts.append(resampler.update(timestamps, chunk["open"], chunk["high"], chunk["low"], chunk["close"]))
+    parts.append(resampler.update([], [], [], [], [], final=True))
+    return _frame(parts)
+
+
+
+if __name__ == "__main__":
+    for path in sorted(glob.glob("./Quotes/CFD/*_quotes*.csv")):
+        start = time.perf_counter()
+        bars = resample_ticks(path, bar_seconds=30)
+        print(f"{path}: {len(bars)} bars in {(time.perf_counter() - start) * 1000:.1f}ms")
+    print(resample_ohlc("./data/GOLD_MINUTE.csv", 15 * 60).tail())
@@ -0,0 +1,98 @@
+from typing import Dict, Iterator, List, Sequence
+
+import numpy as np
+
+
+class RingBuffer:
+    """
+    Fixed-capacity column store for the newest `capacity` rows (bars or ticks).
+
+    Columns live in one float64 array of shape (fields, capacity + slack). Rows are appended
+    left to right; when the slack runs out the newest `capacity` rows are moved back to the
+    front. So the last N values of any column are always one contiguous slice — strategies
+    get float arrays with no per-call copying or list building.
+
+    A row costs 8 bytes per field, roughly 7x less than a dict per bar in a deque, plus the
+    slack (a quarter of `capacity` by default) that makes appends amortized O(1).
+    """
+
+    def __init__(self, fields: Sequence[str], capacity: int, slack: int = None):
+        self.fields = tuple(fields)
+        self.index = {name: k for k, name in enumerate(self.fields)}
+        self.capacity = capacity
+        self._data = np.zeros((len(self.fields), capacity + (slack or max(1, capacity // 4))))
+        self._end = 0       # one past the newest row
+        self._len = 0
+        self.version = 0    # total rows ever appended; changes on every append
+
+    def append(self, *values: float):
+        """Append one row, values in field order."""
+        data = self._data
+        if self._end == data.shape[1]:
+            keep = self.capacity - 1
+            data[:, :keep] = data[:, self._end - keep:self._end]
+            self._end = keep
+        data[:, self._end] = values
+        self._end += 1
+        if self._len < self.capacity:
+            self._len += 1
+        self.version += 1
+
+    def extend(self, rows: np.ndarray):
+        """Append many rows at once; `rows` is (fields, n) like to_array() returns."""
+        rows = np.asarray(rows, dtype=self._data.dtype)
+        self.version += rows.shape[1]
+        if rows.shape[1] > self.capacity:
+            rows = rows[:, -self.capacity:]
+        n = rows.shape[1]
+        keep = min(self._len, self.capacity - n)
+        if self._end + n > self._data.shape[1]:
+            self._data[:, :keep] = self._data[:, self._end - keep:self._end]
+            self._end = keep
+        self._data[:, self._end:self._end + n] = rows
+        self._end += n
+        self._len = keep + n
+
+    def to_array(self) -> np.ndarray:
+        """Copy of all rows as a (fields, len) array, oldest first."""
+        return self._data[:, self._end - self._len:self._end].copy()
+
+    def clear(self):
+        self._end = 0
+        self._len = 0
+        self.version += 1
+
+    def __len__(self) -> int:
+        return self._len
+
+    def __bool__(self) -> bool:
+        return self._len > 0
+
+    def column(self, name: str, n: int = None) -> np.ndarray:
+        """Zero-copy view of the last n values (oldest → newest) of one field."""
+        n = self._len if n is None else min(n, self._len)
+        return self._data[self.index[name], self._end - n:self._end]
+
+    def columns(self, n: int = None) -> Dict[str, np.ndarray]:
+        return {name: self.column(name, n) for name in self.fields}
+
+    def _row(self, pos: int) -> dict:
+        return dict(zip(self.fields, self._data[:, pos].tolist()))
+
+    def __getitem__(self, i):
+        """Row(s) as dicts, e.g. bars[-1]["close"]; kept for code that reads single bars."""
+        if isinstance(i, slice):
+            return [self._row(self._end - self._len + k) for k in range(self._len)[i]]
+        if i < 0:
+            i += self._len
+        if not 0 <= i < self._len:
+            raise IndexError("ring buffer index out of range")
+        return self._row(self._end - self._len + i)
+
+    def __iter__(self) -> Iterator[dict]:
+        start = self._end - self._len
+        for pos in range(start, self._end):
+            yield self._row(pos)
+
+    def to_list(self) -> List[dict]:
+        return list(self)
@@ -8,23 +8,6 @@ class SignalType(Enum):
     NONE = "NONE"
 
 
-def compute_ema(prices, period: int) -> float:
-    """
-    Simple EMA implementation for bar closes.
-    Assumes prices is a list of floats (oldest → newest).
-    """
-    if len(prices) < period:
-        return None
-
-    k = 2 / (period + 1)
-    ema = prices[0]
-
-    for p in prices[1:]:
-        ema = p * k + ema * (1 - k)
-
-    return ema
-
-
 def get_ema_signal_from_bars(
     epic: str,
     fast_period: int = 9,
@@ -40,15 +23,10 @@ def get_ema_signal_from_bars(
     if len(bars) < trend_period + 2:
         return None
 
-    # Extract close prices
-    closes = [b["close"] for b in bars]
-
-    fast = compute_ema(closes, fast_period)
-    slow = compute_ema(closes, slow_period)
-    trend = compute_ema(closes, trend_period)
-
-    if fast is None or slow is None or trend is None:
-        return None
+    indicators = memory.indicators[epic]
+    fast = indicators.ema(fast_period)
+    slow = indicators.ema(slow_period)
+    trend = indicators.ema(trend_period)
 
     # Trend context
     uptrend = slow > trend
@@ -90,23 +68,24 @@ def order_block_signal(
     if len(bars) < trend_period + structure_lookback + 3:
         return None
 
-    closes = [b["close"] for b in bars]
-    highs = [b["high"] for b in bars]
-    lows  = [b["low"] for b in bars]
+    # Only the structure window is read from the bars; the trend EMA is streamed
+    window = structure_lookback + 3
+    highs = bars.column("high", window)
+    lows  = bars.column("low", window)
 
-    slow_trend = compute_ema(closes, trend_period)
+    slow_trend = memory.indicators[epic].ema(trend_period)
     current = bars[-1]
     prev = bars[-2]
     prev2 = bars[-3]
 
     # ---- Trend filter ----
-    uptrend = closes[-1] > slow_trend
-    downtrend = closes[-1] < slow_trend
+    uptrend = current["close"] > slow_trend
+    downtrend = current["close"] < slow_trend
 
     # ---- 1. Displacement detection ----
     # We identify a structural break:
-    recent_high = max(highs[-structure_lookback-3:-3])
-    recent_low = min(lows[-structure_lookback-3:-3])
+    recent_high = highs[:-3].max()
+    recent_low = lows[:-3].min()
 
     broke_up = prev2["close"] > recent_high
     broke_down = prev2["close"] < recent_low
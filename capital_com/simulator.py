@@ -1,6 +1,9 @@
 from enum import Enum
-import asyncio, os, time
-from datetime import datetime
+import asyncio, os
+from collections import defaultdict
+from typing import Dict
+from . import clock
+from .position_book import PositionBook
 
 class SignalType(Enum):
     BUY = "BUY"
@@ -16,12 +19,48 @@ async def log_trade(epic: str, direction: SignalType, pnl: float, exit: str, dur
             await f.write(header)
 
     async with aiofiles.open(file, mode="a") as f:
-        log_entry = f"{datetime.utcnow().isoformat()},{epic},{direction.value},{pnl},{exit},{duration}s\n"
+        log_entry = f"{clock.utcnow().isoformat()},{epic},{direction.value},{pnl},{exit},{duration}s\n"
         await f.write(log_entry)
 
 
 
 
+class SimulatedOrder:
+    """One simulated position; its levels are tracked by the epic's PositionBook."""
+
+    def __init__(self, epic: str, direction: SignalType, entry: float, tp: float, sl: float):
+        self.epic = epic
+        self.direction = direction
+        self.is_buy = direction == SignalType.BUY
+        self.entry = entry
+        self.tp = tp
+        self.sl = sl
+        self.start = None
+        self.closed: asyncio.Future = asyncio.get_running_loop().create_future()
+
+    def on_entry(self):
+        self.start = int(clock.time())
+        print(f"Entered {self.direction.value} on {self.epic} @ {self.entry:.3f} | TP: {self.tp:.3f} | SL: {self.sl:.3f}")
+
+    def on_exit(self, exit_reason: str, pnl: float, current_price: float):
+        duration = int(clock.time()) - self.start
+        if not self.closed.done():
+            self.closed.set_result((exit_reason, pnl, current_price, duration))
+
+
+# Simulated positions per epic, advanced once per tick by Memory.append_tick_data
+books: Dict[str, PositionBook] = defaultdict(PositionBook)
+
+
+def on_tick(epic: str, ask: float, bid: float):
+    books[epic].on_tick(ask, bid)
+
+
+def reset():
+    """Forget every simulated position (their new_order coroutines never complete)."""
+    books.clear()
+
+
 async def new_order(
     epic: str,
     direction: SignalType,
@@ -30,67 +69,24 @@ async def new_order(
     sl: float,
     trail_offset_factor: float = 0.7,   # % of TP distance to trail at (e.g., 0.7 = 70% of TP dist)
 ):
-    from .memory import memory
+    """
+    Simulate an order until it exits. No polling: the epic's PositionBook evaluates it on
+    tick arrival and this coroutine just waits for it to close.
+    """
     try:
-        # Wait for entry price to be touched
-        while True:
-            ask, bid = memory.get_last_price(epic)
-            current_price = ask if direction == SignalType.BUY else bid
-            if (direction == SignalType.BUY and current_price >= entry) or \
-               (direction == SignalType.SELL and current_price <= entry):
-                break
-            await asyncio.sleep(0.2)
-
-        # Entry confirmed
-        start = int(time.time())
-        print(f"Entered {direction.value} on {epic} @ {entry:.3f} | TP: {tp:.3f} | SL: {sl:.3f}")
-
+        order = SimulatedOrder(epic, direction, entry, tp, sl)
         # Compute trail offset (static % of TP distance — no activation delay)
-        tp_distance = abs(tp - entry)
-        trail_offset = tp_distance * trail_offset_factor  # e.g., 0.7 × TP range
-
-        trail_sl = sl  # dynamic trailing SL
-        is_trailing = True 
-
-        while True:
-            await asyncio.sleep(0.5)
-            ask, bid = memory.get_last_price(epic)
-            current_price = ask if direction == SignalType.BUY else bid
-            duration = int(time.time()) - start
-
-            # Update trailing SL continuously
-            if direction == SignalType.BUY:
-                new_sl = current_price - trail_offset
-                if new_sl > trail_sl:
-                    trail_sl = new_sl
-            else:  # SELL
-                new_sl = current_price + trail_offset
-                if new_sl < trail_sl:
-                    trail_sl = new_sl
-
-            # Exit check
-            exit_reason = None
-            pnl = 0.0
-
-            if direction == SignalType.BUY:
-                if current_price >= tp:
-                    exit_reason = "TP"
-                    pnl = tp - entry
-                elif current_price <= trail_sl:
-                    exit_reason = "TrailSL" if trail_sl != sl else "SL"
-                    pnl = trail_sl - entry
-            else:  # SELL
-                if current_price <= tp:
-                    exit_reason = "TP"
-                    pnl = entry - tp
-                elif current_price >= trail_sl:
-                    exit_reason = "TrailSL" if trail_sl != sl else "SL"
-                    pnl = entry - trail_sl
-
-            if exit_reason:
-                await log_trade(epic, direction, pnl, exit_reason, duration)
-                print(f"Exited {direction.value} on {epic} @ {current_price:.3f} | {exit_reason} | PnL: {pnl:.3f} | Dur: {duration}s")
-                return
+        trail_offset = abs(tp - entry) * trail_offset_factor
+        book = books[epic]
+        position = book.add(order, order.is_buy, entry, tp, sl, trail_offset)
+
+        try:
+            exit_reason, pnl, current_price, duration = await order.closed
+        finally:
+            book.cancel(position)
+
+        await log_trade(epic, direction, pnl, exit_reason, duration)
+        print(f"Exited {direction.value} on {epic} @ {current_price:.3f} | {exit_reason} | PnL: {pnl:.3f} | Dur: {duration}s")
 
     except Exception as e:
-        print(f"Error in new_order for {epic}: {e}")
\ No newline at end of file
+        print(f"Error in new_order for {epic}: {e}")
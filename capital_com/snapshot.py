@@ -0,0 +1,219 @@
+import asyncio, glob, json, os, time
+from datetime import datetime, timezone
+from typing import Dict, Iterable, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from .api import fetch_prices
+from .memory import BAR_FIELDS, TICK_FIELDS, Memory
+from .tick_store import DAY_MS, TickStore
+
+SNAPSHOT_PATH = "./data/cache/memory_snapshot.npz"
+SNAPSHOT_VERSION = 1
+CURRENT_FIELDS = ("open", "high", "low", "close", "start_time", "spread_sum", "tick_count")
+
+
+def save_snapshot(memory: Memory, path: str = SNAPSHOT_PATH) -> str:
+    """
+    Write bars, tick history, partial bars, last prices and streaming indicator state of every
+    epic to one compressed .npz (a few hundred KB). The file is replaced atomically, so a
+    crash mid-write leaves the previous snapshot intact.
+    """
+    epics = sorted(set(memory.bars) | set(memory.current_bar) | set(memory.tick_history))
+    arrays = {}
+    current = np.full((len(epics), len(CURRENT_FIELDS)), np.nan)
+    last_price = np.full((len(epics), 2), np.nan)
+    for k, epic in enumerate(epics):
+        if memory.bars.get(epic):
+            arrays[f"bars/{epic}"] = memory.bars[epic].to_array()
+        if memory.tick_history.get(epic):
+            arrays[f"ticks/{epic}"] = memory.tick_history[epic].to_array()
+        if epic in memory.current_bar:
+            current[k] = [memory.current_bar[epic][f] for f in CURRENT_FIELDS]
+        if epic in memory.last_price:
+            last_price[k] = memory.last_price[epic]
+
+    meta = {
+        "version": SNAPSHOT_VERSION,
+        "saved_at": time.time(),
+        "bar_seconds": memory.bar_seconds,
+        "bar_fields": BAR_FIELDS,
+        "tick_fields": TICK_FIELDS,
+        "epics": epics,
+        "indicators": {epic: state.export() for epic, state in memory.indicators.items()},
+    }
+    arrays["meta"] = np.array(json.dumps(meta))
+    arrays["current"] = current
+    arrays["last_price"] = last_price
+
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp = path + ".tmp"
+    with open(tmp, "wb") as f:
+        np.savez_compressed(f, **arrays)
+    os.replace(tmp, path)
+    return path
+
+
+def restore_snapshot(memory: Memory, path: str = SNAPSHOT_PATH) -> bool:
+    """Load a snapshot into a fresh Memory. Snapshots of another bar size or layout are ignored."""
+    if not os.path.exists(path):
+        return False
+    with np.load(path, allow_pickle=False) as npz:
+        meta = json.loads(str(npz["meta"]))
+        if (
+            meta["version"] != SNAPSHOT_VERSION
+            or meta["bar_seconds"] != memory.bar_seconds
+            or tuple(meta["bar_fields"]) != BAR_FIELDS
+            or tuple(meta["tick_fields"]) != TICK_FIELDS
+        ):
+            print(f"Snapshot {path} does not match this Memory (bar_seconds={meta['bar_seconds']}); starting cold")
+            return False
+
+        current, last_price = npz["current"], npz["last_price"]
+        for k, epic in enumerate(meta["epics"]):
+            if f"bars/{epic}" in npz:
+                memory.bars[epic].clear()
+                memory.bars[epic].extend(npz[f"bars/{epic}"])
+            if f"ticks/{epic}" in npz:
+                memory.tick_history[epic].clear()
+                memory.tick_history[epic].extend(npz[f"ticks/{epic}"])
+            if not np.isnan(current[k]).any():
+                bar = dict(zip(CURRENT_FIELDS, current[k].tolist()))
+                bar["tick_count"] = int(bar["tick_count"])
+                memory.current_bar[epic] = bar
+            if not np.isnan(last_price[k]).any():
+                memory.last_price[epic] = tuple(last_price[k].tolist())
+
+    for epic, exported in meta["indicators"].items():
+        memory.indicators[epic].restore(exported)
+
+    age = time.time() - meta["saved_at"]
+    print(f"Restored snapshot of {len(meta['epics'])} epics from {age / 60:.1f} min ago")
+    return True
+
+
+async def snapshot_loop(memory: Memory, path: str = SNAPSHOT_PATH, interval: float = 5 * 60):
+    """Snapshot `memory` every `interval` seconds (run as a task next to the socket)."""
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            save_snapshot(memory, path)
+        except Exception as e:
+            print(f"Snapshot error: {e}")
+
+
+# --- backfill ---
+def _local_ticks(epic: str, since: int, store: Optional[TickStore], directory: str) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Recorded quotes of `epic` after `since` (epoch ms): the TickStore if given, else the daily CSVs."""
+    if store is not None:
+        ticks = store.read(epic, since + 1)
+        return ticks["timestamp"], ticks["ask"], ticks["bid"]
+
+    first_day = datetime.fromtimestamp(since // DAY_MS * 86_400, tz=timezone.utc).strftime("%Y-%m-%d")
+    frames = []
+    for path in sorted(glob.glob(os.path.join(directory, f"{epic}_quotes_*.csv"))):
+        if os.path.basename(path)[len(epic) + len("_quotes_"):-len(".csv")] >= first_day:
+            frames.append(pd.read_csv(path, usecols=["timestamp", "ask", "bid"], dtype={"timestamp": "int64", "ask": "float64", "bid": "float64"}))
+    if not frames:
+        return np.empty(0, np.int64), np.empty(0), np.empty(0)
+    df = pd.concat(frames, ignore_index=True)
+    df = df[df["timestamp"] > since]
+    return df["timestamp"].to_numpy(), df["ask"].to_numpy(), df["bid"].to_numpy()
+
+
+def _price_ticks(prices: list, step_ms: int):
+    """
+    Four synthetic quotes per REST bar (open, low/high in bar direction, close), spread over
+    the bar. Memory builds its bars from ask highs and bid lows, so these rebuild the same
+    high/low/open/close; only tick counts (bar volume) differ from a live feed.
+    """
+    for p in prices:
+        try:
+            t = int(datetime.fromisoformat(p["snapshotTimeUTC"]).replace(tzinfo=timezone.utc).timestamp() * 1000)
+            o = (p["openPrice"]["ask"], p["openPrice"]["bid"])
+            h = (p["highPrice"]["ask"], p["highPrice"]["bid"])
+            l = (p["lowPrice"]["ask"], p["lowPrice"]["bid"])
+            c = (p["closePrice"]["ask"], p["closePrice"]["bid"])
+        except (KeyError, TypeError, ValueError):
+            continue
+        first, second = (l, h) if c[1] >= o[1] else (h, l)
+        for k, (ask, bid) in enumerate((o, first, second, c)):
+            yield t + k * step_ms // 4, float(ask), float(bid)
+
+
+async def _rest_ticks(epic: str, after: int, before: int, rest: bool = True) -> Optional[list]:
+    """
+    Synthetic quotes of the REST minute bars lying wholly between `after` and `before`
+    (epoch ms): from the first whole minute after `after`, so no extremes from before it
+    leak in, to the last minute closed by `before`. [] when no whole minute fits, None
+    when the gap cannot be filled (REST failed, or `rest` is off).
+    """
+    first = after // 60_000 * 60_000 + 60_000
+    last = (before // 60_000 - 1) * 60_000  # start of the last minute ending by `before`
+    if last < first:
+        return []
+    if not rest:
+        return None
+    start = datetime.fromtimestamp(first // 1000, tz=timezone.utc).replace(tzinfo=None)
+    end = datetime.fromtimestamp(last // 1000, tz=timezone.utc).replace(tzinfo=None)
+    try:
+        prices = await fetch_prices(epic, start, end)
+    except Exception as e:
+        print(f"Backfill REST error for {epic}: {e}")
+        return None
+    return [t for t in _price_ticks(prices, 60_000) if first <= t[0] < last + 60_000]
+
+
+async def backfill(
+    memory: Memory,
+    epics: Iterable[str],
+    store: Optional[TickStore] = None,
+    directory: str = "./Quotes",
+    bars: int = 120,
+    rest: bool = True,
+) -> Dict[str, int]:
+    """
+    Bring each epic's bars up to now before the socket starts: from the last tick in memory
+    (restored snapshot), or `bars` bars back on a cold start. Locally recorded quotes are
+    replayed first-hand; the parts of the gap they do not cover, before the first and after
+    the last recorded quote, come from REST minute prices. When such a part cannot be
+    filled, the partial bar is dropped there, so no bar spans the outage.
+    The ticks go through Memory in historical mode: no strategies, latency samples or
+    simulated fills. REST quotes are 4 per minute, not a tick count, so bars holding any
+    get a NaN volume; volume sums and comparisons over them are NaN/False until they have
+    left the window, which keeps volume filters from firing on made-up volume.
+    Returns the number of ticks fed per epic.
+    """
+    now_ms = int(time.time() * 1000)
+    memory.historical = True
+    fed = {}
+    try:
+        for epic in epics:
+            history = memory.tick_history.get(epic)
+            since = int(history.column("timestamp", 1)[0]) if history else now_ms - int(bars * memory.bar_seconds * 1000)
+
+            timestamps, asks, bids = _local_ticks(epic, since, store, directory)
+            local = list(zip(timestamps.tolist(), asks.tolist(), bids.tolist()))
+            gaps = [(since, local[0][0]), (local[-1][0], now_ms)] if local else [(since, now_ms)]
+            fills = [await _rest_ticks(epic, after, before, rest) for after, before in gaps]
+
+            append = memory.append_tick_data
+            fed[epic] = 0
+            # Each gap's REST quotes, then the local quotes that follow it (none after the last gap)
+            for fill, recorded in zip(fills, (local, [])):
+                if fill is None:
+                    # The next quote must open a fresh bar rather than close one spanning the gap
+                    memory.current_bar.pop(epic, None)
+                    fill = []
+                memory.synthetic = True
+                for ts, ask, bid in fill:
+                    await append(epic, ask, bid, ts)
+                memory.synthetic = False
+                for ts, ask, bid in recorded:
+                    await append(epic, ask, bid, ts)
+                fed[epic] += len(fill) + len(recorded)
+            print(f"Backfilled {epic}: {fed[epic]} ticks, {len(memory.bars[epic])} bars")
+    finally:
+        memory.historical = memory.synthetic = False
+    return fed
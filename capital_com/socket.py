@@ -1,14 +1,30 @@
-import websockets, asyncio, json
+import websockets, asyncio, json, time
+from typing import Dict, Iterable, List
 from .memory import memory
+from .decoder import FrameDecoder
+from .latency import latency, now
+
+# Shared by every socket; picks orjson/ujson when installed
+decoder = FrameDecoder()
+
+# Capital.com accepts up to 40 epics per marketData.subscribe message
+SUBSCRIBE_BATCH = 40
 
 
 class CapitalSocket:
-    def __init__(self):
+    def __init__(self, shard: int = 0):
+        self.shard = shard
         self.websocket = None
         self.running = False
         self.subscribed_epics = set()
         self._listen_task = None
 
+        # Message-rate stats
+        self.messages = 0
+        self.quotes = 0
+        self.reconnects = 0
+        self._rate_mark = (time.monotonic(), 0)
+
     
     async def connect_websocket(self):
         """Connect to Capital.com WebSocket if not already connected."""
@@ -39,6 +55,44 @@ class CapitalSocket:
             self.running = False
             
             
+    async def subscribe_to_epics(self, epics: Iterable[str], batch_size: int = SUBSCRIBE_BATCH):
+        """Subscribe to many epics with one marketData.subscribe per `batch_size` epics."""
+        epics = [e for e in dict.fromkeys(epics) if e not in self.subscribed_epics]
+        try:
+            await self.connect_websocket()
+            for i in range(0, len(epics), batch_size):
+                batch = epics[i:i + batch_size]
+                subscribe_msg = {
+                    "destination": "marketData.subscribe",
+                    "correlationId": f"shard_{self.shard}_sub_{i // batch_size}",
+                    "cst": memory.capital_auth_header["CST"],
+                    "securityToken": memory.capital_auth_header["X-SECURITY-TOKEN"],
+                    "payload": {"epics": batch}
+                }
+                await self.websocket.send(json.dumps(subscribe_msg))
+                self.subscribed_epics.update(batch)
+            print(f"Shard {self.shard} subscribed to {len(epics)} epics")
+
+        except Exception as e:
+            print(f"Subscription error on shard {self.shard}: {e}")
+            await asyncio.sleep(1 * 60)  # 1 minute sleep
+            await self.subscribe_to_epics(epics, batch_size)
+
+    def stats(self) -> dict:
+        """Totals since start plus the message rate since the previous stats() call."""
+        now = time.monotonic()
+        mark_time, mark_messages = self._rate_mark
+        self._rate_mark = (now, self.messages)
+        return {
+            "shard": self.shard,
+            "epics": len(self.subscribed_epics),
+            "connected": self.running,
+            "messages": self.messages,
+            "quotes": self.quotes,
+            "reconnects": self.reconnects,
+            "msg_per_s": (self.messages - mark_messages) / (now - mark_time) if now > mark_time else 0.0,
+        }
+
     async def subscribe_to_epic(self, epic: str):
         """Subscribe to real-time data for a given epic."""
         try:
@@ -71,21 +125,20 @@ class CapitalSocket:
             while self.running and self.websocket:
                 try:
                     message = await asyncio.wait_for(self.websocket.recv(), timeout=300)
-                    data = json.loads(message)
+                    received = now()
+                    destination, data = decoder.decode(message)
+                    self.messages += 1
                     
-                    if data["destination"] == "marketData.subscribe":
+                    if destination == "quote":
+                        self.quotes += 1
+                        epic, ask, ask_size, bid, bid_size, timestamp = data
+                        latency.tick_received(epic, received)
+                        await memory.append_tick_data(epic=epic, ask=ask, bid=bid, timestamp=timestamp)
+                        memory.log_quotes(epic, ask, ask_size, bid, bid_size, timestamp)
+                    elif destination == "marketData.subscribe":
                         print(f"Subscription confirmed: {data['payload']}")
-                    elif data["destination"] == "marketData.unsubscribe":
+                    elif destination == "marketData.unsubscribe":
                         print(f"Unsubscribed: {data['payload']}")
-                    elif data["destination"] == "quote":
-                        payload = data["payload"]
-                        await memory.append_tick_data(
-                            epic=payload["epic"],
-                            ask=payload["ofr"],
-                            bid=payload["bid"],
-                            timestamp=payload["timestamp"]
-                        )
-                        memory.log_quotes(epic=payload["epic"], ask=payload["ofr"], ask_size=payload.get("ofrQty", 0), bid=payload["bid"], bid_size=payload.get("bidQty", 0), timestamp=payload["timestamp"])
                         
 
                 except (asyncio.TimeoutError, websockets.exceptions.ConnectionClosedError) as e:
@@ -105,15 +158,50 @@ class CapitalSocket:
                 self.websocket = None
 
             self._listen_task = None  # Mark task as finished
-            print("WebSocket disconnected. Attempting to reconnect...")
+            self.reconnects += 1
+            print(f"WebSocket shard {self.shard} disconnected. Attempting to reconnect...")
             await asyncio.sleep(1)  # Prevent reconnect flood
 
-            # Resubscribe to previous epics after reconnect
+            # Resubscribe to previous epics after reconnect (batched; only this shard)
             epics = list(self.subscribed_epics)
             self.subscribed_epics.clear()
-            for epic in epics:
-                await self.subscribe_to_epic(epic)
-                await asyncio.sleep(0.5)
+            await self.subscribe_to_epics(epics)
+
+
+
+class ShardedCapitalSocket:
+    """
+    Spreads a large watch list over `shards` websocket connections, each with its own
+    listener task and reconnect loop. Every shard feeds the same Memory, so downstream
+    code sees one merged quote stream.
+    """
+
+    def __init__(self, shards: int = 4, batch_size: int = SUBSCRIBE_BATCH):
+        self.shards: List[CapitalSocket] = [CapitalSocket(shard=i) for i in range(shards)]
+        self.batch_size = batch_size
+        self.assignment: Dict[str, int] = {}
+
+    async def connect_websocket(self):
+        await asyncio.gather(*(shard.connect_websocket() for shard in self.shards))
+
+    async def subscribe(self, epics: Iterable[str]):
+        """Assign new epics to the least-loaded shards, then subscribe each shard in batches."""
+        load = [len(shard.subscribed_epics) for shard in self.shards]
+        new: Dict[int, List[str]] = {}
+        for epic in dict.fromkeys(epics):
+            if epic in self.assignment:
+                continue
+            k = load.index(min(load))
+            load[k] += 1
+            self.assignment[epic] = k
+            new.setdefault(k, []).append(epic)
+        await asyncio.gather(*(self.shards[k].subscribe_to_epics(batch, self.batch_size) for k, batch in new.items()))
+
+    async def ping_socket(self):
+        await asyncio.gather(*(shard.ping_socket() for shard in self.shards))
+
+    def stats(self) -> List[dict]:
+        return [shard.stats() for shard in self.shards]
 
 
 
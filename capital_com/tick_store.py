@@ -0,0 +1,235 @@
+import glob, os, struct
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+# One fixed-width 40-byte record per quote, little endian
+TICK_DTYPE = np.dtype([
+    ("timestamp", "<i8"),  # epoch milliseconds
+    ("ask", "<f8"),
+    ("ask_size", "<f8"),
+    ("bid", "<f8"),
+    ("bid_size", "<f8"),
+])
+
+# Segment header: magic, record size, header size, UTC day number, epic (zero padded),
+# then the index: first and last timestamp and whether records are in timestamp order.
+# Records start at the header size stored in the file; segments with a bare 64-byte
+# header (no index) are still read, their order is checked on read instead.
+MAGIC = b"TICKSTR1"
+HEADER = struct.Struct("<8sIIq40s")
+INDEX = struct.Struct("<qqq")
+HEADER_SIZE = 128  # HEADER + INDEX, zero padded
+DAY_MS = 86_400_000
+EMPTY_INDEX = (np.iinfo(np.int64).max, np.iinfo(np.int64).min, 1)
+
+
+def _day_str(day: int) -> str:
+    return datetime.fromtimestamp(day * 86_400, tz=timezone.utc).strftime("%Y-%m-%d")
+
+def _to_ms(ts) -> Optional[int]:
+    """None | epoch ms int | epoch float (ms above 1e12, else seconds, like Memory) | datetime-like -> epoch ms."""
+    if ts is None:
+        return None
+    if isinstance(ts, (int, np.integer)):
+        return int(ts)
+    if isinstance(ts, (float, np.floating)):
+        return int(ts) if ts > 1e12 else int(round(ts * 1000))
+    ts = pd.Timestamp(ts)
+    if ts.tzinfo is None:
+        ts = ts.tz_localize("UTC")
+    return ts.value // 1_000_000
+
+
+class TickStore:
+    """
+    Append-only binary quote store: {root}/{epic}/{YYYY-MM-DD}.ticks
+    Each day segment is a 128-byte header followed by TICK_DTYPE records in arrival order,
+    so readers memory-map it straight into a NumPy structured array (no parsing). The header
+    indexes the segment's time range and ordering: reads skip segments outside the range
+    and slice ordered ones by binary search on the timestamp column.
+    """
+
+    def __init__(self, root: str = "./Quotes/ticks"):
+        self.root = root
+        self._handles: Dict[str, Tuple[int, object, Optional[list]]] = {}  # epic -> (day, file, index)
+
+    # --- layout ---
+    def segment_path(self, epic: str, day: int) -> str:
+        return os.path.join(self.root, epic, f"{_day_str(day)}.ticks")
+
+    def epics(self) -> List[str]:
+        if not os.path.isdir(self.root):
+            return []
+        return sorted(e for e in os.listdir(self.root) if os.path.isdir(os.path.join(self.root, e)))
+
+    def days(self, epic: str) -> List[int]:
+        """UTC day numbers (days since epoch) with a segment for this epic, oldest first."""
+        days = []
+        for path in glob.glob(os.path.join(self.root, epic, "*.ticks")):
+            name = os.path.basename(path)[:-len(".ticks")]
+            days.append(int(np.datetime64(name, "D").astype(np.int64)))
+        return sorted(days)
+
+    # --- writing ---
+    def _handle(self, epic: str, day: int):
+        current = self._handles.get(epic)
+        if current is not None and current[0] == day:
+            return current
+        if current is not None:
+            current[1].close()
+
+        path = self.segment_path(epic, day)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        f = open(path, "r+b" if os.path.exists(path) else "w+b")
+        size = f.seek(0, os.SEEK_END)
+        if size == 0:
+            header = HEADER.pack(MAGIC, TICK_DTYPE.itemsize, HEADER_SIZE, day, epic.encode()[:40]) + INDEX.pack(*EMPTY_INDEX)
+            f.write(header.ljust(HEADER_SIZE, b"\0"))
+            index = list(EMPTY_INDEX)
+        else:
+            f.seek(0)
+            header = f.read(HEADER_SIZE)
+            header_size = HEADER.unpack_from(header)[2]
+            # Segments without an index header stay unindexed; readers check their order
+            index = list(INDEX.unpack_from(header, HEADER.size)) if header_size >= HEADER.size + INDEX.size else None
+            if (size - header_size) % TICK_DTYPE.itemsize:
+                # Torn record from an interrupted write: drop it so records stay aligned
+                size -= (size - header_size) % TICK_DTYPE.itemsize
+                f.truncate(size)
+            f.seek(size)
+        current = self._handles[epic] = (day, f, index)
+        return current
+
+    def append(self, epic: str, ticks: np.ndarray):
+        """
+        Append TICK_DTYPE records in arrival order (as delivered by the stream).
+        Records are split into their UTC day segments; each segment gets one write. Records
+        older than the segment's last one are kept, but mark the segment unordered.
+        """
+        if not len(ticks):
+            return
+        ticks = np.ascontiguousarray(ticks, dtype=TICK_DTYPE)
+        days = ticks["timestamp"] // DAY_MS
+        segments = np.unique(days).tolist()
+        for day in segments:
+            chunk = ticks if len(segments) == 1 else ticks[days == day]
+            _, f, index = self._handle(epic, day)
+            if index is not None:
+                ts = chunk["timestamp"]
+                ordered = index[2] and ts[0] >= index[1] and bool((ts[1:] >= ts[:-1]).all())
+                updated = [min(index[0], int(ts.min())), max(index[1], int(ts.max())), int(ordered)]
+                if updated != index:
+                    # Widen the index before writing the records, so a crash in between
+                    # leaves a header that still covers every record on disk
+                    end = f.tell()
+                    f.seek(HEADER.size)
+                    f.write(INDEX.pack(*updated))
+                    f.seek(end)
+                    index[:] = updated
+            f.write(chunk.tobytes())
+
+    def flush(self):
+        for _, f, _ in self._handles.values():
+            f.flush()
+
+    def close(self):
+        for _, f, _ in self._handles.values():
+            f.close()
+        self._handles.clear()
+
+    # --- reading ---
+    def _segment(self, path: str) -> Tuple[np.ndarray, Optional[tuple]]:
+        """Memory-mapped records of one day segment and its (first, last, ordered) index, if any."""
+        with open(path, "rb") as f:
+            header = f.read(HEADER_SIZE)
+        magic, record_size, header_size, _, _ = HEADER.unpack_from(header)
+        if magic != MAGIC or record_size != TICK_DTYPE.itemsize:
+            raise ValueError(f"Not a tick segment: {path}")
+        index = INDEX.unpack_from(header, HEADER.size) if header_size >= HEADER.size + INDEX.size else None
+        count = (os.path.getsize(path) - header_size) // record_size
+        if count == 0:
+            return np.empty(0, dtype=TICK_DTYPE), index
+        return np.memmap(path, dtype=TICK_DTYPE, mode="r", offset=header_size, shape=(count,)), index
+
+    def read_segment(self, path: str) -> np.ndarray:
+        """Memory-mapped, read-only view of one day segment."""
+        return self._segment(path)[0]
+
+    def read(self, epic: str, start=None, end=None) -> np.ndarray:
+        """
+        Ticks of one epic with start <= timestamp < end (epoch ms or datetime-like, UTC), in
+        arrival order. Ranges within one ordered segment are zero-copy memmap views; unordered
+        segments are filtered by a mask and multi-day ranges are concatenated.
+        """
+        start_ms, end_ms = _to_ms(start), _to_ms(end)
+        parts = []
+        for day in self.days(epic):
+            if start_ms is not None and (day + 1) * DAY_MS <= start_ms:
+                continue
+            if end_ms is not None and day * DAY_MS >= end_ms:
+                break
+            ticks, index = self._segment(self.segment_path(epic, day))
+            ts = ticks["timestamp"]
+            if index is not None:
+                first, last, ordered = index
+                if (start_ms is not None and last < start_ms) or (end_ms is not None and first >= end_ms):
+                    continue
+            else:
+                ordered = bool((ts[1:] >= ts[:-1]).all())
+            if not ordered:
+                mask = np.ones(len(ticks), dtype=bool)
+                if start_ms is not None:
+                    mask &= ts >= start_ms
+                if end_ms is not None:
+                    mask &= ts < end_ms
+                if mask.any():
+                    parts.append(ticks[mask])
+                continue
+            lo = 0 if start_ms is None else int(np.searchsorted(ts, start_ms, side="left"))
+            hi = len(ticks) if end_ms is None else int(np.searchsorted(ts, end_ms, side="left"))
+            if hi > lo:
+                parts.append(ticks[lo:hi])
+
+        if not parts:
+            return np.empty(0, dtype=TICK_DTYPE)
+        return parts[0] if len(parts) == 1 else np.concatenate(parts)
+
+    def chunks(self, epic: str, chunksize: int = 1_000_000):
+        """All ticks of one epic as memmap views of at most `chunksize` records, in arrival order."""
+        for day in self.days(epic):
+            ticks = self.read_segment(self.segment_path(epic, day))
+            for lo in range(0, len(ticks), chunksize):
+                yield ticks[lo:lo + chunksize]
+
+    def read_frame(self, epic: str, start=None, end=None) -> pd.DataFrame:
+        return pd.DataFrame(self.read(epic, start, end))
+
+
+def convert_csv(path: str, store: TickStore, epic: Optional[str] = None) -> int:
+    """
+    Import a quote CSV (timestamp,ask,ask_size,bid,bid_size) into the store; returns rows written.
+    Segments are append-only, so convert each file once.
+    """
+    from .replay import epic_from_path
+
+    epic = epic or epic_from_path(path)
+    df = pd.read_csv(path)
+    ticks = np.empty(len(df), dtype=TICK_DTYPE)
+    for name in TICK_DTYPE.names:
+        ticks[name] = df[name].to_numpy() if name in df else 0
+    ticks = ticks[np.argsort(ticks["timestamp"], kind="stable")]
+    store.append(epic, ticks)
+    store.flush()
+    return len(ticks)
+
+
+
+if __name__ == "__main__":
+    store = TickStore()
+    for path in sorted(glob.glob("./Quotes/CFD/*_quotes*.csv")):
+        rows = convert_csv(path, store)
+        print(f"Converted {path}: {rows} ticks")
+    store.close()
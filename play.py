@@ -1,28 +1,52 @@
 from capital_com.api import save_ohlc_data
 
 from capital_com.socket import capital_socket, memory
-import asyncio
+from capital_com.quote_recorder import quote_recorder
+from capital_com.dispatcher import dispatcher
+from capital_com.latency import latency
+from capital_com.snapshot import backfill, restore_snapshot, save_snapshot, snapshot_loop
+import asyncio, signal
+
+EPICS = ["GOLD", "SILVER", "OIL_CRUDE", "US100", "US500", "BTCUSD", "ETHUSD", "GBPUSD", "AUDUSD"]
 
 
 async def main():
     # await save_ohlc_data("GOLD", resolution="MINUTE", n=1_000)
 
+    # Warm start: last snapshot + the quotes missed since, so signals are live right away
+    restore_snapshot(memory)
     await memory.update_auth_header()
+    await backfill(memory, EPICS, store=quote_recorder.store)
+    snapshots = asyncio.create_task(snapshot_loop(memory))
+
+    evaluator = memory.start_evaluator()
+    loop = asyncio.get_running_loop()
+    # `kill -USR1 <pid>` dumps tick-to-webhook latency percentiles
+    loop.add_signal_handler(signal.SIGUSR1, latency.print_report)
+    # A deploy stop (SIGTERM) cancels main, so the finally below still saves the snapshot
+    loop.add_signal_handler(signal.SIGTERM, asyncio.current_task().cancel)
     await capital_socket.connect_websocket()
-    await capital_socket.subscribe_to_epic("GOLD")
-    await capital_socket.subscribe_to_epic("SILVER")
-    await capital_socket.subscribe_to_epic("OIL_CRUDE")
-    await capital_socket.subscribe_to_epic("US100")
-    await capital_socket.subscribe_to_epic("US500")
-    await capital_socket.subscribe_to_epic("BTCUSD")
-    await capital_socket.subscribe_to_epic("ETHUSD")
-    await capital_socket.subscribe_to_epic("GBPUSD")
-    await capital_socket.subscribe_to_epic("AUDUSD")
-
-    while True:
-        await asyncio.sleep(5 * 60)
-        await memory.update_auth_header()
-        await capital_socket.ping_socket()
-
-
-asyncio.run(main())
\ No newline at end of file
+    for epic in EPICS:
+        await capital_socket.subscribe_to_epic(epic)
+
+    try:
+        while True:
+            await asyncio.sleep(5 * 60)
+            await memory.update_auth_header()
+            await capital_socket.ping_socket()
+            print(f"Evaluator: {evaluator.stats()}")
+            print(f"Hooks: {dispatcher.summary()}")
+    finally:
+        snapshots.cancel()
+        save_snapshot(memory)
+        await dispatcher.close()
+        latency.print_report()
+
+
+try:
+    asyncio.run(main())
+except asyncio.CancelledError:
+    pass
+finally:
+    quote_recorder.close()
+    print(f"Quote recorder: {quote_recorder.stats()}")
\ No newline at end of file
@@ -1,19 +1,14 @@
-import yfinance as yf
 import pandas as pd
 import numpy as np
-
-def atr(df, period=14):
-    high_low = df['High'] - df['Low']
-    high_close = np.abs(df['High'] - df['Close'].shift())
-    low_close = np.abs(df['Low'] - df['Close'].shift())
-    tr = pd.concat([high_low, high_close, low_close], axis=1).max(axis=1)
-    return tr.rolling(period).mean()
+from analysis.indicators import indicator
+from .data import load_ohlc
+from .exits import resolve_exits
 
 def get_levels(entry_price, atr_val, atr_mult=2.0, rr=4.0, notional=1000.0):
     """Return take-profit and stop-loss PnL targets (in $ terms)."""
     sl_dist = atr_mult * atr_val
     tp_dist = sl_dist * rr
-    sl_pnl = max(notional * (sl_dist / entry_price), 20)  # min $20 SL
+    sl_pnl = np.maximum(notional * (sl_dist / entry_price), 20)  # min $20 SL
     tp_pnl = notional * (tp_dist / entry_price)
     return tp_pnl, sl_pnl
 
@@ -30,6 +25,75 @@ def signal_atr_breakout(df, i, atr_period=20, atr_mult=1.0):
         return "SELL"
     return None
 
+def signal_atr_breakout_vectorized(df, atr_period=20, atr_mult=1.0):
+    """Return the full BUY/SELL signal column for ATR breakout in one pass."""
+    close = df['Close'].to_numpy()
+    prev_high = df['High'].shift().to_numpy()
+    prev_low = df['Low'].shift().to_numpy()
+    vol = atr_mult * df['ATR'].to_numpy()
+
+    buy = close > prev_high + vol
+    sell = ~buy & (close < prev_low - vol)
+    signals = np.where(buy, "BUY", np.where(sell, "SELL", None))
+    signals[:atr_period + 1] = None
+    return pd.Series(signals, index=df.index, dtype=object)
+
+def run_atr_breakout(
+    df,
+    ticker,
+    notional=1000.0,
+    leverage=20,
+    atr_period=20,
+    atr_mult=1.0,
+    rr=4.0,
+    trade_max_duration=5,
+    vectorized=True,
+):
+    """Run ATR breakout over an OHLC frame (Date/Open/High/Low/Close columns) and return the trades."""
+    # A copy with the ATR column the signal functions read; the caller's frame is left alone
+    df = df.assign(ATR=indicator(df, "atr", period=atr_period))
+
+    if vectorized:
+        signals = signal_atr_breakout_vectorized(df, atr_period, atr_mult)
+    else:
+        signals = pd.Series([signal_atr_breakout(df, i, atr_period, atr_mult) for i in range(len(df))], index=df.index, dtype=object)
+
+    entry_index = np.flatnonzero(signals.notna().to_numpy())
+    side = signals.to_numpy()[entry_index]
+    direction = np.where(side == "BUY", 1, -1)
+
+    entry_price = df['Close'].to_numpy()[entry_index]
+    atr_val = df['ATR'].to_numpy()[entry_index]
+    tp_pnl_d, sl_pnl_d = get_levels(entry_price, atr_val, atr_mult, rr, notional)
+    tp_price = entry_price + direction * (tp_pnl_d / notional) * entry_price
+    sl_price = entry_price - direction * (sl_pnl_d / notional) * entry_price
+
+    exit_index, exit_price, exit_type = resolve_exits(
+        df['High'].to_numpy(), df['Low'].to_numpy(), df['Close'].to_numpy(),
+        entry_index, side, tp_price, sl_price, trade_max_duration,
+    )
+
+    size = notional / entry_price
+    spread_cost = np.abs(exit_price - entry_price) * (size / leverage)
+    pnl = (exit_price - entry_price) * size * direction
+    pnl_adj = pnl - spread_cost
+
+    trades = {
+        "epic": ticker,
+        "size": size,
+        "pnl": pnl_adj,
+        "direction": side,
+        "exit_type": exit_type,
+        "entry_price": entry_price,
+        "exit_price": exit_price,
+        "opened_at": df["Date"].iloc[entry_index].to_numpy(),
+        "closed_at": df["Date"].iloc[exit_index].to_numpy(),
+        "hook_name": "ATR BRK OUT",
+        "spread_cost": spread_cost
+    } if len(entry_index) else []
+
+    return pd.DataFrame(trades)
+
 def backtest_atr_breakout(
     ticker,
     interval="1d",
@@ -40,88 +104,19 @@ def backtest_atr_breakout(
     atr_mult=1.0,
     rr=4.0,
     trade_max_duration=5,
+    vectorized=True,
+    loader=None,
 ):
-    df = yf.Ticker(ticker).history(interval=interval, period=period)
-    df.reset_index(inplace=True)
-    df['ATR'] = atr(df, atr_period)
-
-    trades = []
-    for i in range(len(df)):
-        side = signal_atr_breakout(df, i, atr_period, atr_mult)
-        if side is None:
-            continue
-
-        entry_row = df.iloc[i]
-        entry_price = entry_row['Close']
-        atr_val = entry_row['ATR']
-        tp_pnl_d, sl_pnl_d = get_levels(entry_price, atr_val, atr_mult, rr, notional)
-
-        size = notional / entry_price
-        max_exit_index = min(i + trade_max_duration, len(df) - 1)
-        exit_index, exit_price, exit_type = None, None, "EOW_CLOSE"
-
-        for j in range(i + 1, max_exit_index + 1):
-            high, low = df.iloc[j][['High', 'Low']]
-
-            if side == "BUY":
-                tp_price = entry_price + (tp_pnl_d / notional) * entry_price
-                sl_price = entry_price - (sl_pnl_d / notional) * entry_price
-                if high >= tp_price:
-                    exit_index = j
-                    exit_price = tp_price
-                    exit_type = "TP"
-                    break
-                elif low <= sl_price:
-                    exit_index = j
-                    exit_price = sl_price
-                    exit_type = "SL"
-                    break
-
-            elif side == "SELL":
-                tp_price = entry_price - (tp_pnl_d / notional) * entry_price
-                sl_price = entry_price + (sl_pnl_d / notional) * entry_price
-                if low <= tp_price:
-                    exit_index = j
-                    exit_price = tp_price
-                    exit_type = "TP"
-                    break
-                elif high >= sl_price:
-                    exit_index = j
-                    exit_price = sl_price
-                    exit_type = "SL"
-                    break
-
-        if exit_index is None:
-            exit_index = max_exit_index
-            exit_price = df.iloc[exit_index]['Close']
-            exit_type = "EOW_CLOSE"
-
-        spread_cost = abs(exit_price - entry_price) * (size / leverage)
-        pnl = (exit_price - entry_price) * size * (1 if side == "BUY" else -1)
-        pnl_adj = pnl - spread_cost
-
-        trades.append({
-            "epic": ticker,
-            "size": size,
-            "pnl": pnl_adj,
-            "direction": side,
-            "exit_type": exit_type,
-            "entry_price": entry_price,
-            "exit_price": exit_price,
-            "opened_at": entry_row["Date"],
-            "closed_at": df.iloc[exit_index]["Date"],
-            "hook_name": "ATR BRK OUT",
-            "spread_cost": spread_cost
-        })
-
-    trades_df = pd.DataFrame(trades)
+    df = load_ohlc(ticker, interval, period, loader=loader)
+
+    trades_df = run_atr_breakout(df, ticker, notional, leverage, atr_period, atr_mult, rr, trade_max_duration, vectorized)
     trades_df.to_csv(f"./data/{ticker}_atr_breakout_trades.csv", index=False)
     print(f"Backtest complete: {len(trades_df)} trades logged → {ticker}_atr_breakout_trades.csv")
     return trades_df
 
 
-
 if __name__ == "__main__":
+    # Package-relative imports: run from the repo root as `python -m strategies.atr_brk_out`
     tickers = ["AAPL", "MSFT", "META", "NVDA", "TSLA", "GOOGL", "GOOG", "ORCL" ,"BTC-USD", "ETH-USD"]
     for ticker in tickers:
         backtest_atr_breakout(ticker, interval="1d", period="3mo")
@@ -0,0 +1,170 @@
+import json
+import os
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+import yfinance as yf
+
+CACHE_DIR = "./data/cache"
+
+COLUMNS = ["Open", "High", "Low", "Close", "Volume"]
+BAR_DTYPE = np.dtype([("Date", "i8")] + [(col, "f8") for col in COLUMNS])
+
+# Seconds per bar for yfinance intervals; also the default cache max age
+INTERVAL_SECONDS = {
+    "1m": 60, "2m": 120, "5m": 300, "15m": 900, "30m": 1800, "60m": 3600, "90m": 5400,
+    "1h": 3600, "1d": 86400, "5d": 5 * 86400, "1wk": 7 * 86400, "1mo": 30 * 86400, "3mo": 90 * 86400,
+}
+
+
+# === Helpers ===
+def normalize(df):
+    """yfinance/CSV frame -> Date + OHLCV columns with a RangeIndex."""
+    if "Date" not in df.columns:
+        df = df.reset_index()
+    df = df.rename(columns={"Datetime": "Date", "index": "Date"})
+    if "Volume" not in df.columns:
+        df["Volume"] = 0.0
+    return df[["Date"] + COLUMNS].astype({col: float for col in COLUMNS}).reset_index(drop=True)
+
+def period_start(period, end):
+    """Start timestamp of a yfinance-style period ("5d", "3mo", "2y", "ytd", "max") ending at `end`."""
+    if period == "max":
+        return None
+    if period == "ytd":
+        return end.normalize().replace(month=1, day=1)
+    for suffix, unit in (("mo", "months"), ("y", "years"), ("d", "days"), ("wk", "weeks")):
+        if period.endswith(suffix):
+            return end - pd.DateOffset(**{unit: int(period[:-len(suffix)])})
+    raise ValueError(f"Unknown period: {period}")
+
+def _tz(df):
+    tz = pd.DatetimeIndex(df["Date"]).tz
+    return None if tz is None else str(tz)
+
+def _to_records(df):
+    dates = pd.DatetimeIndex(df["Date"])
+    records = np.empty(len(df), dtype=BAR_DTYPE)
+    records["Date"] = (dates.tz_convert("UTC") if dates.tz is not None else dates).as_unit("ns").asi8
+    for col in COLUMNS:
+        records[col] = df[col].to_numpy(dtype=float)
+    return records
+
+def _from_records(records, tz):
+    dates = pd.to_datetime(np.asarray(records["Date"]), utc=tz is not None)
+    if tz:
+        dates = dates.tz_convert(tz)
+    return pd.DataFrame({"Date": dates, **{col: np.asarray(records[col]) for col in COLUMNS}})
+
+
+# === Loaders ===
+def yfinance_loader(ticker, interval="1d", period=None, start=None):
+    """Download bars from yfinance, either for a period or from a start timestamp."""
+    if start is not None:
+        df = yf.Ticker(ticker).history(interval=interval, start=start)
+    else:
+        df = yf.Ticker(ticker).history(interval=interval, period=period)
+    return normalize(df)
+
+def csv_loader(path):
+    """
+    Loader for local OHLC files: Capital.com exports (timestamp,open,high,low,close,
+    e.g. data/GOLD_MINUTE.csv) or yfinance-style Date,Open,High,Low,Close files.
+    The period is counted back from the last bar in the file.
+    """
+    def load(ticker, interval="1d", period="max"):
+        df = pd.read_csv(path)
+        df = df.rename(columns={"timestamp": "Date", "open": "Open", "high": "High", "low": "Low", "close": "Close", "volume": "Volume"})
+        df["Date"] = pd.to_datetime(df["Date"])
+        df = normalize(df.sort_values("Date"))
+        start = period_start(period, df["Date"].iloc[-1]) if len(df) else None
+        return df if start is None else df[df["Date"] >= start].reset_index(drop=True)
+    return load
+
+
+# === Cache ===
+def _paths(ticker, interval, cache_dir):
+    base = os.path.join(cache_dir, f"{ticker}_{interval}")
+    return base + ".npy", base + ".json"
+
+def _write_cache(df, meta, ticker, interval, cache_dir):
+    os.makedirs(cache_dir, exist_ok=True)
+    npy_path, meta_path = _paths(ticker, interval, cache_dir)
+    _replace(npy_path, "wb", lambda f: np.save(f, _to_records(df)))
+    _replace(meta_path, "w", lambda f: json.dump(meta, f))
+
+def _replace(path, mode, write):
+    """
+    Write a unique temp file next to `path`, then rename it over `path`: readers never see a
+    half-written file, and concurrent writers of the same cache entry can't interleave.
+    """
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), prefix=os.path.basename(path) + ".", suffix=".tmp")
+    try:
+        with os.fdopen(fd, mode) as f:
+            write(f)
+        os.replace(tmp, path)
+    except BaseException:
+        os.unlink(tmp)
+        raise
+
+def read_cache(ticker, interval, cache_dir=CACHE_DIR):
+    """Cached bars (memory-mapped, no network) and their metadata, or (None, None)."""
+    npy_path, meta_path = _paths(ticker, interval, cache_dir)
+    if not (os.path.exists(npy_path) and os.path.exists(meta_path)):
+        return None, None
+    with open(meta_path) as f:
+        meta = json.load(f)
+    return _from_records(np.load(npy_path, mmap_mode="r"), meta["tz"]), meta
+
+def load_ohlc(ticker, interval="1d", period="6mo", loader=None, cache_dir=CACHE_DIR, max_age=None):
+    """
+    Bars for `ticker` as a Date/Open/High/Low/Close/Volume frame.
+
+    With a custom `loader(ticker, interval, period)` (e.g. csv_loader) the data is read from it directly.
+    Otherwise yfinance is used behind an on-disk cache keyed by ticker and interval:
+      - cache younger than max_age (default: one bar interval) -> served from disk, no network
+      - older cache -> only bars from the last cached timestamp onwards are downloaded and merged
+      - cache not reaching back to the requested period -> full download
+    Bars served from a cache that reaches further back are trimmed to the period's first day.
+    """
+    if loader is not None:
+        return loader(ticker, interval, period)
+    if cache_dir is None:
+        return yfinance_loader(ticker, interval, period=period)
+
+    max_age = INTERVAL_SECONDS.get(interval, 60) if max_age is None else max_age
+    now = pd.Timestamp.now(tz="UTC")
+    wanted_from = period_start(period, now)
+    if wanted_from is not None:
+        # yfinance resolves periods to whole days; a time-of-day cutoff would drop the first bar
+        wanted_from = wanted_from.normalize()
+    cached, meta = read_cache(ticker, interval, cache_dir)
+
+    covers = cached is not None and len(cached) and (
+        meta["covers_from"] is None
+        or (wanted_from is not None and pd.Timestamp(meta["covers_from"]) <= wanted_from)
+    )
+
+    if not covers:
+        df = yfinance_loader(ticker, interval, period=period)
+        meta = {"tz": _tz(df), "covers_from": None if wanted_from is None else wanted_from.isoformat()}
+    elif time.time() - meta["fetched_at"] >= max_age:
+        # The last cached bar may still have been forming, so refetch from it
+        fresh = yfinance_loader(ticker, interval, start=cached["Date"].iloc[-1])
+        df = pd.concat([cached, fresh], ignore_index=True)
+        df = df.drop_duplicates("Date", keep="last").sort_values("Date", kind="stable").reset_index(drop=True)
+    else:
+        df = cached
+
+    if df is not cached:
+        meta["fetched_at"] = time.time()
+        _write_cache(df, meta, ticker, interval, cache_dir)
+
+    if wanted_from is not None and covers:
+        # A fresh full download is already exactly `period`; only trim older, longer caches
+        if meta["tz"] is None:
+            wanted_from = wanted_from.tz_localize(None)
+        df = df[df["Date"] >= wanted_from].reset_index(drop=True)
+    return df
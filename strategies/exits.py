@@ -0,0 +1,61 @@
+import numpy as np
+
+def resolve_exits(high, low, close, entry_index, side, tp_price, sl_price, max_duration, chunk_cells=1_000_000):
+    """
+    First-touch TP/SL resolution for a batch of entries.
+
+    Every entry i is scanned over bars entry_index[i]+1 .. entry_index[i]+max_duration[i]
+    (capped at the last bar). TP is checked before SL on the same bar, like the
+    per-row loop it replaces. Entries that touch neither level close at the last
+    bar of their window ("EOW_CLOSE").
+    Returns (exit_index, exit_price, exit_type) arrays aligned with entry_index.
+    """
+    high = np.asarray(high, dtype=float)
+    low = np.asarray(low, dtype=float)
+    close = np.asarray(close, dtype=float)
+    entry_index = np.asarray(entry_index, dtype=np.int64)
+    side = np.asarray(side)
+    tp_price = np.asarray(tp_price, dtype=float)
+    sl_price = np.asarray(sl_price, dtype=float)
+
+    n = len(close)
+    m = len(entry_index)
+    max_duration = np.broadcast_to(np.asarray(max_duration, dtype=np.int64), (m,))
+
+    last = np.minimum(entry_index + max_duration, n - 1)
+    exit_index = last.copy()
+    exit_price = close[last]
+    exit_type = np.full(m, "EOW_CLOSE", dtype=object)
+
+    width = int((last - entry_index).max()) if m else 0
+    if width <= 0:
+        return exit_index, exit_price, exit_type
+
+    # Bound the (entries x window) matrices so long holding periods don't blow up memory
+    offsets = np.arange(1, width + 1)
+    step = max(1, chunk_cells // width)
+    for start in range(0, m, step):
+        rows = slice(start, start + step)
+        j = entry_index[rows, None] + offsets
+        in_window = j <= last[rows, None]
+        j = np.minimum(j, n - 1)
+        h, l = high[j], low[j]
+
+        is_buy = (side[rows] == "BUY")[:, None]
+        tp = tp_price[rows, None]
+        sl = sl_price[rows, None]
+        tp_hit = np.where(is_buy, h >= tp, l <= tp) & in_window
+        sl_hit = np.where(is_buy, l <= sl, h >= sl) & in_window
+
+        hit = tp_hit | sl_hit
+        first = hit.argmax(axis=1)
+        touched = np.flatnonzero(hit.any(axis=1))
+        k = first[touched]
+        is_tp = tp_hit[touched, k]
+
+        idx = touched + start
+        exit_index[idx] = j[touched, k]
+        exit_price[idx] = np.where(is_tp, tp_price[idx], sl_price[idx])
+        exit_type[idx] = np.where(is_tp, "TP", "SL")
+
+    return exit_index, exit_price, exit_type
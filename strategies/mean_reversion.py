@@ -1,31 +1,14 @@
-import yfinance as yf
 import pandas as pd
 import numpy as np
-
-def rsi(series, period=14):
-    delta = series.diff()
-    gain = np.where(delta > 0, delta, 0)
-    loss = np.where(delta < 0, -delta, 0)
-    avg_gain = pd.Series(gain).rolling(window=period).mean()
-    avg_loss = pd.Series(loss).rolling(window=period).mean()
-    rs = avg_gain / avg_loss
-    return 100 - (100 / (1 + rs))
-
-def ema(series, period):
-    return series.ewm(span=period, adjust=False).mean()
-
-def atr(df, period=14):
-    high_low = df['High'] - df['Low']
-    high_close = np.abs(df['High'] - df['Close'].shift())
-    low_close = np.abs(df['Low'] - df['Close'].shift())
-    tr = pd.concat([high_low, high_close, low_close], axis=1).max(axis=1)
-    return tr.rolling(window=period).mean()
+from analysis.indicators import indicator, rsi, ema, atr
+from .data import load_ohlc
+from .exits import resolve_exits
 
 def get_levels(entry_price, atr_val, atr_mult=2.0, rr=4.0, notional=1000.0):
     """Return take-profit and stop-loss PnL targets (in $ terms)."""
     sl_dist = atr_mult * atr_val
     tp_dist = sl_dist * rr
-    sl_pnl = max(notional * (sl_dist / entry_price), 20)  # min $20 SL
+    sl_pnl = np.maximum(notional * (sl_dist / entry_price), 20)  # min $20 SL
     tp_pnl = notional * (tp_dist / entry_price)
     return tp_pnl, sl_pnl
 
@@ -40,11 +23,11 @@ def signal_mean_reversion(df, i, rsi_period=2, base_oversold=10, base_overbought
     # --- Indicators ---
     rsi_series = rsi(closes, rsi_period)
     ema_50 = ema(closes, trend_len)
-    atr_series = atr(df.iloc[:i+1], vol_window)
+    atr_series = atr(df['High'].iloc[:i+1], df['Low'].iloc[:i+1], closes, vol_window)
 
-    rsi_val = rsi_series.iloc[-1]
-    ema_val = ema_50.iloc[-1]
-    atr_val = atr_series.iloc[-1]
+    rsi_val = rsi_series[-1]
+    ema_val = ema_50[-1]
+    atr_val = atr_series[-1]
 
     if np.isnan(rsi_val) or np.isnan(ema_val) or np.isnan(atr_val):
         return None
@@ -69,6 +52,92 @@ def signal_mean_reversion(df, i, rsi_period=2, base_oversold=10, base_overbought
         return "SELL"
     return None
 
+def signal_mean_reversion_vectorized(df, rsi_period=2, base_oversold=10, base_overbought=90, trend_len=50, vol_window=14):
+    """Same rules as signal_mean_reversion, with indicators computed once for the whole series."""
+    close = df['Close'].to_numpy()
+
+    # --- Indicators ---
+    rsi_val = indicator(df, "rsi", period=rsi_period)
+    ema_val = indicator(df, "ema", period=trend_len)
+    atr_val = indicator(df, "atr", period=vol_window)
+    avg_range = indicator(df, "avg_range", period=vol_window)
+
+    valid = ~(np.isnan(rsi_val) | np.isnan(ema_val) | np.isnan(atr_val))
+    valid[:max(rsi_period, trend_len, vol_window) + 1] = False
+
+    # --- Trend bias ---
+    with np.errstate(divide='ignore', invalid='ignore'):
+        trend_bias = np.where(ema_val != 0, (close - ema_val) / ema_val, 0)
+    bias = np.sign(trend_bias)
+
+    # --- Adaptive RSI thresholds ---
+    oversold = base_oversold + np.where(bias > 0, 5, 0)
+    overbought = base_overbought - np.where(bias < 0, 5, 0)
+
+    # --- Volatility sanity check ---
+    valid &= ~(atr_val > avg_range * 1.5)
+
+    # --- Entry logic ---
+    buy = valid & (rsi_val < oversold) & (bias >= 0)
+    sell = valid & ~buy & (rsi_val > overbought) & (bias <= 0)
+    signals = np.where(buy, "BUY", np.where(sell, "SELL", None))
+    return pd.Series(signals, index=df.index, dtype=object)
+
+def run_mean_reversion(
+    df,
+    ticker,
+    notional=1000.0,
+    leverage=20,
+    atr_period=20,
+    atr_mult=1.0,
+    rr=4.0,
+    trade_max_duration=5,
+    vectorized=True,
+):
+    """Run mean reversion over an OHLC frame (Date/Open/High/Low/Close columns) and return the trades."""
+    atr_values = indicator(df, "atr", period=atr_period)
+
+    if vectorized:
+        signals = signal_mean_reversion_vectorized(df)
+    else:
+        signals = pd.Series([signal_mean_reversion(df, i) for i in range(len(df))], index=df.index, dtype=object)
+
+    entry_index = np.flatnonzero(signals.notna().to_numpy())
+    side = signals.to_numpy()[entry_index]
+    direction = np.where(side == "BUY", 1, -1)
+
+    entry_price = df['Close'].to_numpy()[entry_index]
+    atr_val = atr_values[entry_index]
+    tp_pnl_d, sl_pnl_d = get_levels(entry_price, atr_val, atr_mult, rr, notional)
+    tp_price = entry_price + direction * (tp_pnl_d / notional) * entry_price
+    sl_price = entry_price - direction * (sl_pnl_d / notional) * entry_price
+
+    exit_index, exit_price, exit_type = resolve_exits(
+        df['High'].to_numpy(), df['Low'].to_numpy(), df['Close'].to_numpy(),
+        entry_index, side, tp_price, sl_price, trade_max_duration,
+    )
+
+    size = notional / entry_price
+    spread_cost = np.abs(exit_price - entry_price) * (size / leverage)
+    pnl = (exit_price - entry_price) * size * direction
+    pnl_adj = pnl - spread_cost
+
+    trades = {
+        "epic": ticker,
+        "size": size,
+        "pnl": pnl_adj,
+        "direction": side,
+        "exit_type": exit_type,
+        "entry_price": entry_price,
+        "exit_price": exit_price,
+        "opened_at": df["Date"].iloc[entry_index].to_numpy(),
+        "closed_at": df["Date"].iloc[exit_index].to_numpy(),
+        "hook_name": "MEAN REVERSION",
+        "spread_cost": spread_cost
+    } if len(entry_index) else []
+
+    return pd.DataFrame(trades)
+
 def backtest_mean_reversion(
     ticker,
     interval="1d",
@@ -79,88 +148,19 @@ def backtest_mean_reversion(
     atr_mult=1.0,
     rr=4.0,
     trade_max_duration=5,
+    vectorized=True,
+    loader=None,
 ):
-    df = yf.Ticker(ticker).history(interval=interval, period=period)
-    df.reset_index(inplace=True)
-    df['ATR'] = atr(df, atr_period)
-
-    trades = []
-    for i in range(len(df)):
-        side = signal_mean_reversion(df, i)
-        if side is None:
-            continue
-
-        entry_row = df.iloc[i]
-        entry_price = entry_row['Close']
-        atr_val = entry_row['ATR']
-        tp_pnl_d, sl_pnl_d = get_levels(entry_price, atr_val, atr_mult, rr, notional)
-
-        size = notional / entry_price
-        max_exit_index = min(i + trade_max_duration, len(df) - 1)
-        exit_index, exit_price, exit_type = None, None, "EOW_CLOSE"
-
-        for j in range(i + 1, max_exit_index + 1):
-            high, low = df.iloc[j][['High', 'Low']]
-
-            if side == "BUY":
-                tp_price = entry_price + (tp_pnl_d / notional) * entry_price
-                sl_price = entry_price - (sl_pnl_d / notional) * entry_price
-                if high >= tp_price:
-                    exit_index = j
-                    exit_price = tp_price
-                    exit_type = "TP"
-                    break
-                elif low <= sl_price:
-                    exit_index = j
-                    exit_price = sl_price
-                    exit_type = "SL"
-                    break
-
-            elif side == "SELL":
-                tp_price = entry_price - (tp_pnl_d / notional) * entry_price
-                sl_price = entry_price + (sl_pnl_d / notional) * entry_price
-                if low <= tp_price:
-                    exit_index = j
-                    exit_price = tp_price
-                    exit_type = "TP"
-                    break
-                elif high >= sl_price:
-                    exit_index = j
-                    exit_price = sl_price
-                    exit_type = "SL"
-                    break
-
-        if exit_index is None:
-            exit_index = max_exit_index
-            exit_price = df.iloc[exit_index]['Close']
-            exit_type = "EOW_CLOSE"
-
-        spread_cost = abs(exit_price - entry_price) * (size / leverage)
-        pnl = (exit_price - entry_price) * size * (1 if side == "BUY" else -1)
-        pnl_adj = pnl - spread_cost
-
-        trades.append({
-            "epic": ticker,
-            "size": size,
-            "pnl": pnl_adj,
-            "direction": side,
-            "exit_type": exit_type,
-            "entry_price": entry_price,
-            "exit_price": exit_price,
-            "opened_at": entry_row["Date"],
-            "closed_at": df.iloc[exit_index]["Date"],
-            "hook_name": "MEAN REVERSION",
-            "spread_cost": spread_cost
-        })
-
-    trades_df = pd.DataFrame(trades)
+    df = load_ohlc(ticker, interval, period, loader=loader)
+
+    trades_df = run_mean_reversion(df, ticker, notional, leverage, atr_period, atr_mult, rr, trade_max_duration, vectorized)
     trades_df.to_csv(f"./data/{ticker}_mean_reversion_trades.csv", index=False)
     print(f"Backtest complete: {len(trades_df)} trades logged → {ticker}_mean_reversion_trades.csv")
     return trades_df
 
 
-
 if __name__ == "__main__":
+    # Package-relative imports: run from the repo root as `python -m strategies.mean_reversion`
     tickers = ["AAPL", "MSFT", "META", "NVDA", "TSLA", "GOOGL", "GOOG", "ORCL" ,"BTC-USD", "ETH-USD"]
     for ticker in tickers:
         backtest_mean_reversion(ticker, interval="1d", period="3mo")
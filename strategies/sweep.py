@@ -0,0 +1,192 @@
+import inspect
+import itertools
+import os
+import random
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import resource_tracker, util
+from multiprocessing.shared_memory import SharedMemory
+
+import numpy as np
+import pandas as pd
+
+from .atr_brk_out import run_atr_breakout
+from .data import load_ohlc
+from .mean_reversion import run_mean_reversion
+from .sharpe_ratio import calc_sharpe
+
+STRATEGIES = {
+    "atr_breakout": run_atr_breakout,
+    "mean_reversion": run_mean_reversion,
+}
+
+PRICE_COLUMNS = ["Open", "High", "Low", "Close"]
+
+# Worker-side state, set once per process by _init_worker
+_shm = None
+_frame = None
+_job = None
+
+
+# === Shared OHLC frame ===
+def share_frame(df):
+    """
+    Copy the Date + OHLC columns into one shared-memory block.
+    Returns (shm, spec); the caller owns shm and must release_frame() it.
+    """
+    n = len(df)
+    shm = SharedMemory(create=True, size=max(1, 8 * n * (len(PRICE_COLUMNS) + 1)))
+    prices = np.ndarray((len(PRICE_COLUMNS), n), dtype=np.float64, buffer=shm.buf)
+    for k, col in enumerate(PRICE_COLUMNS):
+        prices[k] = df[col].to_numpy(dtype=np.float64)
+
+    dates = pd.DatetimeIndex(df["Date"])
+    tz = str(dates.tz) if dates.tz is not None else None
+    stamps = np.ndarray(n, dtype=np.int64, buffer=shm.buf, offset=prices.nbytes)
+    stamps[:] = (dates.tz_convert("UTC") if tz else dates).as_unit("ns").asi8
+    return shm, {"name": shm.name, "n": n, "tz": tz}
+
+def _attach_untracked(name):
+    """
+    Open an existing block without leaving it registered with the resource tracker. Before
+    Python 3.13 every attach registers it, so the tracker warns about a leak or unlinks it
+    early when the pool shuts down; only the creating process should track the block.
+    """
+    if "track" in inspect.signature(SharedMemory).parameters:
+        return SharedMemory(name=name, track=False)
+    shm = SharedMemory(name=name)
+    resource_tracker.unregister(shm._name, "shared_memory")
+    return shm
+
+def release_frame(shm):
+    """Close and unlink a block from share_frame once every worker is done with it."""
+    shm.close()
+    if "track" not in inspect.signature(SharedMemory).parameters:
+        # Workers share this process's tracker and unregistered the name when attaching;
+        # register it again so unlink()'s own unregister finds it
+        resource_tracker.register(shm._name, "shared_memory")
+    shm.unlink()
+
+def attach_frame(spec):
+    """
+    Rebuild the frame on top of the shared block (prices are views, not copies).
+    The caller must drop the frame before shm.close(); the creating process owns unlink().
+    """
+    shm = _attach_untracked(spec["name"])
+
+    n = spec["n"]
+    prices = np.ndarray((len(PRICE_COLUMNS), n), dtype=np.float64, buffer=shm.buf)
+    stamps = np.ndarray(n, dtype=np.int64, buffer=shm.buf, offset=prices.nbytes)
+    dates = pd.to_datetime(stamps, utc=spec["tz"] is not None)
+    if spec["tz"]:
+        dates = dates.tz_convert(spec["tz"])
+
+    df = pd.DataFrame(prices.T, columns=PRICE_COLUMNS, copy=False)
+    df.insert(0, "Date", dates)
+    return shm, df
+
+
+# === Parameter sets ===
+def param_grid(grid):
+    """Every combination of a {param: [values]} grid."""
+    keys = list(grid)
+    return [dict(zip(keys, values)) for values in itertools.product(*(grid[k] for k in keys))]
+
+def random_params(space, n, seed=0):
+    """n random draws from a {param: [values]} space; (lo, hi) tuples are sampled uniformly."""
+    rng = random.Random(seed)
+    draws = []
+    for _ in range(n):
+        params = {}
+        for key, values in space.items():
+            if isinstance(values, tuple):
+                lo, hi = values
+                params[key] = rng.randint(lo, hi) if isinstance(lo, int) and isinstance(hi, int) else rng.uniform(lo, hi)
+            else:
+                params[key] = rng.choice(values)
+        draws.append(params)
+    return draws
+
+
+# === Evaluation ===
+def score_trades(trades, leverage=20):
+    """Summary stats for a trade log; Sharpe is on return-on-margin like analyze_backtest."""
+    if trades.empty:
+        return {"trades": 0, "pnl": 0.0, "win_rate": np.nan, "sharpe": np.nan}
+    margin_used = (trades["entry_price"] * trades["size"]) / leverage
+    return {
+        "trades": len(trades),
+        "pnl": trades["pnl"].sum(),
+        "win_rate": (trades["pnl"] > 0).mean(),
+        "sharpe": calc_sharpe(trades["pnl"] / margin_used),
+    }
+
+def _init_worker(spec, job):
+    global _shm, _frame, _job
+    _shm, _frame = attach_frame(spec)
+    _job = job
+    util.Finalize(None, _close_worker, exitpriority=10)
+
+def _close_worker():
+    """Worker exit: drop the frame's views into the shared block, then close our handle."""
+    global _shm, _frame, _job
+    shm, _shm, _frame, _job = _shm, None, None, None
+    if shm is not None:
+        shm.close()
+
+def _evaluate(params):
+    strategy, ticker, fixed = _job
+    kwargs = {**fixed, **params}
+    trades = STRATEGIES[strategy](_frame, ticker, **kwargs)
+    return {**params, **score_trades(trades, kwargs.get("leverage", 20))}
+
+def rank_results(rows):
+    results = pd.DataFrame(rows)
+    if results.empty:
+        return results
+    results = results.sort_values("sharpe", ascending=False, na_position="last", kind="stable").reset_index(drop=True)
+    results.insert(0, "rank", np.arange(1, len(results) + 1))
+    return results
+
+def sweep(df, strategy, grid=None, n_random=None, seed=0, ticker="SWEEP", workers=None, chunksize=None, **fixed):
+    """
+    Evaluate parameter combinations of a strategy over one OHLC frame in a process pool.
+
+    grid:     {param: [values]}; every combination is run, or n_random draws when n_random is set
+    fixed:    extra keyword arguments passed unchanged to every run (e.g. notional, leverage)
+    Returns a results table ranked by Sharpe (best first).
+    """
+    combos = random_params(grid, n_random, seed) if n_random else param_grid(grid)
+    job = (strategy, ticker, fixed)
+    workers = workers or os.cpu_count() or 1
+
+    if workers == 1:
+        global _frame, _job
+        _frame, _job = df, job
+        try:
+            return rank_results([_evaluate(params) for params in combos])
+        finally:
+            _frame, _job = None, None
+
+    # Small chunks keep cores busy at the tail, big enough to amortize IPC
+    chunksize = chunksize or max(1, len(combos) // (workers * 8))
+    shm, spec = share_frame(df)
+    try:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(spec, job)) as pool:
+            rows = list(pool.map(_evaluate, combos, chunksize=chunksize))
+    finally:
+        release_frame(shm)
+    return rank_results(rows)
+
+
+
+if __name__ == "__main__":
+    df = load_ohlc("BTC-USD", interval="1d", period="2y")
+
+    grid = {
+        "atr_period": [10, 14, 20, 30],
+        "atr_mult": [0.5, 1.0, 1.5, 2.0],
+        "rr": [1.5, 2.0, 3.0, 4.0],
+        "trade_max_duration": [3, 5, 10],
+    }
+    results = sweep(df, "atr_breakout", grid, ticker="BTC-USD")
+    print(results.head(20))
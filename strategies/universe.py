@@ -0,0 +1,127 @@
+import os
+import queue
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+import pandas as pd
+
+from .data import load_ohlc
+from .sweep import STRATEGIES
+
+
+class StageTimer:
+    """Busy time and wall-clock span of one pipeline stage (thread-safe)."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.busy = 0.0
+        self.slowest = 0.0
+        self.count = 0
+        self.first_start = None
+        self.last_end = None
+
+    def add(self, start, end):
+        with self.lock:
+            self.busy += end - start
+            self.slowest = max(self.slowest, end - start)
+            self.count += 1
+            self.first_start = start if self.first_start is None else min(self.first_start, start)
+            self.last_end = end if self.last_end is None else max(self.last_end, end)
+
+    def summary(self):
+        span = (self.last_end - self.first_start) if self.count else 0.0
+        return {"count": self.count, "busy_s": self.busy, "slowest_s": self.slowest, "span_s": span}
+
+
+def _compute(strategy, df, ticker, params):
+    start = time.perf_counter()
+    trades = STRATEGIES[strategy](df, ticker, **params)
+    return trades, time.perf_counter() - start
+
+
+def run_universe(
+    tickers,
+    strategy="atr_breakout",
+    interval="1d",
+    period="3mo",
+    loader=None,
+    out_path=None,
+    prefetch_workers=16,
+    compute_workers=None,
+    **params,
+):
+    """
+    Backtest one strategy over many tickers as a pipeline:
+      load (thread pool, I/O bound) -> compute (process pool) -> write (single writer, the calling thread)
+    A ticker is handed to the next stage as soon as it is ready, so the stages overlap and the
+    total time tracks the slowest stage instead of the sum of all three.
+    Returns (all trades, per-stage timings).
+    """
+    out_path = out_path or f"./data/universe_{strategy}_trades.csv"
+    timers = {"load": StageTimer(), "compute": StageTimer(), "write": StageTimer()}
+    results = queue.Queue()
+    errors = {}
+    wall_start = time.perf_counter()
+
+    def on_computed(ticker, future):
+        try:
+            trades, seconds = future.result()
+            end = time.perf_counter()
+            timers["compute"].add(end - seconds, end)
+            results.put((ticker, trades))
+        except Exception as e:
+            errors[ticker] = f"compute: {e}"
+            results.put((ticker, None))
+
+    def load(ticker):
+        start = time.perf_counter()
+        try:
+            df = load_ohlc(ticker, interval, period, loader=loader)
+            timers["load"].add(start, time.perf_counter())
+            future = compute_pool.submit(_compute, strategy, df, ticker, params)
+        except Exception as e:
+            errors[ticker] = f"load: {e}"
+            results.put((ticker, None))
+            return
+        future.add_done_callback(lambda f: on_computed(ticker, f))
+
+    frames = []
+    with ProcessPoolExecutor(max_workers=compute_workers) as compute_pool, \
+            ThreadPoolExecutor(max_workers=prefetch_workers) as load_pool:
+        for ticker in tickers:
+            load_pool.submit(load, ticker)
+
+        # Single writer: one file handle, header written once
+        os.makedirs(os.path.dirname(out_path) or ".", exist_ok=True)
+        with open(out_path, "w", newline="") as f:
+            header = True
+            for _ in range(len(tickers)):
+                ticker, trades = results.get()
+                if trades is None or trades.empty:
+                    continue
+                start = time.perf_counter()
+                trades.to_csv(f, header=header, index=False)
+                header = False
+                frames.append(trades)
+                timers["write"].add(start, time.perf_counter())
+
+    timings = {stage: timer.summary() for stage, timer in timers.items()}
+    timings["wall_s"] = time.perf_counter() - wall_start
+
+    for ticker, error in errors.items():
+        print(f"Universe error for {ticker}: {error}")
+    print(f"Universe complete: {len(tickers)} tickers in {timings['wall_s']:.2f}s → {out_path}")
+    for stage in ("load", "compute", "write"):
+        t = timings[stage]
+        print(f"  {stage:<8} n={t['count']:<5} busy={t['busy_s']:.2f}s span={t['span_s']:.2f}s slowest={t['slowest_s']:.3f}s")
+
+    trades = pd.concat(frames, ignore_index=True) if frames else pd.DataFrame()
+    return trades, timings
+
+
+
+if __name__ == "__main__":
+    tickers = ["AAPL", "MSFT", "META", "NVDA", "TSLA", "GOOGL", "GOOG", "ORCL" ,"BTC-USD", "ETH-USD"]
+    run_universe(tickers, "atr_breakout", interval="1d", period="3mo")
+    run_universe(tickers, "mean_reversion", interval="1d", period="3mo")
@@ -0,0 +1,147 @@
+import math
+import os
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import util
+
+import numpy as np
+import pandas as pd
+
+from .data import load_ohlc
+from .sweep import STRATEGIES, attach_frame, param_grid, release_frame, score_trades, share_frame
+
+# Worker-side state, set once per process by _init_worker
+_shm = None
+_frame = None
+_job = None
+_fits = {}
+
+
+def make_windows(n, is_bars, oos_bars, step=None):
+    """Rolling (is_start, oos_start, oos_end) bar indices; each window is [start, end)."""
+    step = step or oos_bars
+    return [(s, s + is_bars, min(s + is_bars + oos_bars, n)) for s in range(0, n - is_bars, step)]
+
+def _full_history_trades(params):
+    """
+    Trades for one parameter set over the whole history, cached per worker.
+    Indicators are computed once on the full frame; every window just slices this log.
+    """
+    key = tuple(sorted(params.items()))
+    if key not in _fits:
+        strategy, ticker, fixed, grid = _job
+        _fits[key] = STRATEGIES[strategy](_frame, ticker, **{**fixed, **params})
+    return _fits[key]
+
+def _slice(trades, start, end, closed=False):
+    dates = _frame["Date"]
+    lo = dates.iloc[start]
+    hi = dates.iloc[end] if end < len(dates) else None
+    mask = trades["opened_at"] >= lo
+    if hi is not None:
+        mask &= trades["opened_at"] < hi
+        # In-sample fits only see trades that were also closed in-sample
+        if closed:
+            mask &= trades["closed_at"] < hi
+    return trades[mask]
+
+def _evaluate_window(window):
+    is_start, oos_start, oos_end = window
+    strategy, ticker, fixed, grid = _job
+    leverage = fixed.get("leverage", 20)
+
+    best, best_score = None, None
+    for params in grid:
+        trades = _full_history_trades(params)
+        if trades.empty:
+            continue
+        score = score_trades(_slice(trades, is_start, oos_start, closed=True), leverage)
+        if np.isnan(score["sharpe"]):
+            continue
+        if best_score is None or score["sharpe"] > best_score["sharpe"]:
+            best, best_score = params, score
+
+    if best is None:
+        return {"is_start": is_start, "oos_start": oos_start, "oos_end": oos_end}, pd.DataFrame()
+
+    oos_trades = _slice(_full_history_trades(best), oos_start, oos_end)
+    oos_score = score_trades(oos_trades, leverage)
+    row = {
+        "is_start": is_start, "oos_start": oos_start, "oos_end": oos_end, **best,
+        **{f"is_{k}": v for k, v in best_score.items()},
+        **{f"oos_{k}": v for k, v in oos_score.items()},
+    }
+    return row, oos_trades
+
+def _init_worker(spec, job):
+    global _shm, _frame, _job
+    _shm, _frame = attach_frame(spec)
+    _job = job
+    _fits.clear()
+    util.Finalize(None, _close_worker, exitpriority=10)
+
+def _close_worker():
+    """Worker exit: drop the frame's views into the shared block, then close our handle."""
+    global _shm, _frame, _job
+    shm, _shm, _frame, _job = _shm, None, None, None
+    _fits.clear()
+    if shm is not None:
+        shm.close()
+
+def walk_forward(df, strategy, grid, is_bars, oos_bars, step=None, ticker="WF", workers=None, **fixed):
+    """
+    Walk-forward optimization: pick the best-Sharpe parameters on each rolling in-sample window,
+    then trade them on the following out-of-sample window.
+
+    Windows run in parallel over a shared-memory copy of the frame. Each worker keeps the
+    full-history trade log of every parameter set it has fitted, so overlapping in-sample
+    windows reuse fits instead of re-running the backtest.
+    Returns (stitched out-of-sample trades, equity curve, per-window report).
+    """
+    windows = make_windows(len(df), is_bars, oos_bars, step)
+    job = (strategy, ticker, fixed, param_grid(grid))
+    workers = workers or os.cpu_count() or 1
+
+    global _frame, _job
+    if workers == 1:
+        _frame, _job = df, job
+        _fits.clear()
+        try:
+            results = [_evaluate_window(w) for w in windows]
+        finally:
+            _frame, _job = None, None
+            _fits.clear()
+    else:
+        # Contiguous chunks: neighbouring windows share in-sample bars, so keep them on one worker
+        chunksize = max(1, math.ceil(len(windows) / workers))
+        shm, spec = share_frame(df)
+        try:
+            with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(spec, job)) as pool:
+                results = list(pool.map(_evaluate_window, windows, chunksize=chunksize))
+        finally:
+            release_frame(shm)
+
+    report = pd.DataFrame([row for row, _ in results])
+    frames = [trades for _, trades in results if not trades.empty]
+    trades = pd.concat(frames, ignore_index=True) if frames else pd.DataFrame()
+
+    if trades.empty:
+        equity = pd.DataFrame(columns=["closed_at", "pnl", "equity"])
+    else:
+        equity = trades.sort_values("closed_at", kind="stable")[["closed_at", "pnl"]].reset_index(drop=True)
+        equity["equity"] = equity["pnl"].cumsum()
+    return trades, equity, report
+
+
+
+if __name__ == "__main__":
+    df = load_ohlc("BTC-USD", interval="1d", period="5y")
+    grid = {
+        "atr_period": [10, 14, 20],
+        "atr_mult": [0.5, 1.0, 1.5],
+        "rr": [1.5, 2.0, 3.0],
+        "trade_max_duration": [3, 5, 10],
+    }
+    trades, equity, report = walk_forward(df, "atr_breakout", grid, is_bars=250, oos_bars=60, ticker="BTC-USD")
+    trades.to_csv("./data/BTC-USD_atr_breakout_walk_forward_trades.csv", index=False)
+    print(report)
+    print(f"Walk-forward complete: {len(trades)} OOS trades, final equity {equity['equity'].iloc[-1] if len(equity) else 0:.2f}")